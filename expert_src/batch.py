@@ -0,0 +1,206 @@
+"""
+Pipelined batch enrichment.
+
+Each company still runs its graph nodes in order, but many companies are in
+flight at once and every external call goes through a per-stage worker pool:
+the search stage (Tavily) and the LLM stage (Anthropic) each have a fixed
+number of slots, sized to the provider's limits. While company N waits for an
+LLM slot to extract its schema, company N+1's searches run in the search pool,
+so neither provider idles while the other works. The pools are provider
+concurrency limits in agent.resilience, so retries, hedges and circuit
+breakers apply inside them.
+
+The report gives each stage's utilization (slot-seconds busy over slots times
+wall time), the time companies spent queued for a slot, and peak slots in use.
+
+Usage:
+    python -m agent.batch companies.jsonl --search-slots 8 --llm-slots 4 --out results.jsonl
+Each input line is {"company", "extraction_schema"?, "user_notes"?, "config"?}.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Optional
+
+from agent.graph import graph
+from agent.resilience import get_provider, set_concurrency_limit
+
+STAGES = {"search": "tavily", "llm": "anthropic"}  # stage -> provider
+
+
+def validate_job(job: Any) -> Optional[str]:
+    """Why the job can't run, or None when it is well-formed."""
+    if not isinstance(job, dict):
+        return "job must be an object"
+    if not isinstance(job.get("company"), str) or not job["company"].strip():
+        return "'company' must be a non-empty string"
+    for key in ("extraction_schema", "config"):
+        if job.get(key) is not None and not isinstance(job[key], dict):
+            return f"'{key}' must be an object"
+    return None
+
+
+def _stage_snapshot() -> dict[str, dict]:
+    snapshot = {}
+    for stage, name in STAGES.items():
+        provider = get_provider(name)
+        snapshot[stage] = {
+            "calls": provider.stats["calls"],
+            "busy_s": provider.busy_s,
+            "slot_wait_s": provider.slot_wait_s,
+        }
+    return snapshot
+
+
+async def run_batch(
+    jobs: list[dict],
+    search_slots: int = 8,
+    llm_slots: int = 4,
+    max_in_flight: Optional[int] = None,
+    config: Optional[dict[str, Any]] = None,
+) -> tuple[list[dict], dict]:
+    """
+    Enrich every job with the search and LLM stages pipelined across companies.
+
+    Args:
+        jobs: graph inputs, each with "company" and optionally "extraction_schema", "user_notes" and "config"
+        search_slots: concurrent Tavily calls (search stage pool size)
+        llm_slots: concurrent Anthropic calls (LLM stage pool size)
+        max_in_flight: companies running at once, by default enough to keep both pools busy
+        config: configurable values applied to every job (a job's own "config" wins)
+
+    Returns:
+        Per-job results in input order (malformed jobs get status "invalid" and
+        don't run), and the batch report with per-stage utilization
+
+    The pools are process-wide, so calls made by anything else in the process
+    (e.g. the enrichment service) share them; only one batch may hold them at
+    a time.
+    """
+    held = [name for name in STAGES.values() if get_provider(name).limit is not None]
+    if held:
+        raise RuntimeError(f"provider pools already limited (another batch?): {held}")
+    limits = {"search": search_slots, "llm": llm_slots}
+    for stage, name in STAGES.items():
+        set_concurrency_limit(name, limits[stage])
+    admission = asyncio.Semaphore(max_in_flight or search_slots + llm_slots)
+    before = _stage_snapshot()
+    started = time.monotonic()
+
+    async def run_one(job: dict) -> dict:
+        problem = validate_job(job)
+        if problem:
+            company = job.get("company") if isinstance(job, dict) else None
+            return {"company": company, "status": "invalid", "error": problem}
+        async with admission:
+            job_started = time.monotonic()
+            graph_input = {
+                k: job[k]
+                for k in ("company", "extraction_schema", "user_notes")
+                if job.get(k) is not None
+            }
+            configurable = {**(config or {}), **(job.get("config") or {})}
+            record = {"company": job["company"]}
+            try:
+                output = await graph.ainvoke(
+                    graph_input, config={"configurable": configurable}
+                )
+                record.update(status="succeeded", **output)
+            except Exception as e:
+                record.update(status="failed", error=repr(e))
+            record["elapsed_s"] = round(time.monotonic() - job_started, 3)
+            return record
+
+    try:
+        results = await asyncio.gather(*(run_one(job) for job in jobs))
+    finally:
+        peaks = {
+            stage: get_provider(name).peak_in_use for stage, name in STAGES.items()
+        }
+        for name in STAGES.values():
+            set_concurrency_limit(name, None)
+    wall_s = time.monotonic() - started
+
+    after = _stage_snapshot()
+    stages = {}
+    for stage, name in STAGES.items():
+        busy_s = after[stage]["busy_s"] - before[stage]["busy_s"]
+        stages[stage] = {
+            "provider": name,
+            "slots": limits[stage],
+            "calls": after[stage]["calls"] - before[stage]["calls"],
+            "busy_s": round(busy_s, 3),
+            "utilization": (
+                round(busy_s / (limits[stage] * wall_s), 4) if wall_s else 0.0
+            ),
+            "slot_wait_s": round(
+                after[stage]["slot_wait_s"] - before[stage]["slot_wait_s"], 3
+            ),
+            "peak_in_use": peaks[stage],
+        }
+    report = {
+        "companies": len(jobs),
+        "succeeded": sum(r["status"] == "succeeded" for r in results),
+        "failed": sum(r["status"] == "failed" for r in results),
+        "invalid": sum(r["status"] == "invalid" for r in results),
+        "wall_s": round(wall_s, 3),
+        "companies_per_min": round(60 * len(jobs) / wall_s, 2) if wall_s else None,
+        "stages": stages,
+    }
+    return list(results), report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Enrich a batch of companies with pipelined stage pools."
+    )
+    parser.add_argument("input", help="JSONL file, one job per line")
+    parser.add_argument(
+        "--search-slots", type=int, default=8, help="Concurrent Tavily calls"
+    )
+    parser.add_argument(
+        "--llm-slots", type=int, default=4, help="Concurrent Anthropic calls"
+    )
+    parser.add_argument(
+        "--max-in-flight", type=int, default=None, help="Companies running at once"
+    )
+    parser.add_argument("--out", default="batch_results.jsonl")
+    parser.add_argument(
+        "--report", default=None, help="Also write the report JSON here"
+    )
+    args = parser.parse_args(argv)
+
+    jobs = []
+    with open(args.input) as f:
+        for line in f:
+            if line.strip():
+                try:
+                    jobs.append(json.loads(line))
+                except json.JSONDecodeError:
+                    jobs.append(line.strip())  # reported as invalid, not fatal
+    results, report = asyncio.run(
+        run_batch(jobs, args.search_slots, args.llm_slots, args.max_in_flight)
+    )
+    with open(args.out, "w") as f:
+        for record in results:
+            f.write(json.dumps(record, default=str) + "\n")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print(
+        f"{report['succeeded']}/{report['companies']} succeeded in {report['wall_s']}s "
+        f"({report['companies_per_min']} companies/min)"
+    )
+    for stage, s in report["stages"].items():
+        print(
+            f"  {stage:<6} {s['provider']:<9} slots {s['slots']:<3} calls {s['calls']:<5} "
+            f"utilization {s['utilization']:.0%}  slot wait {s['slot_wait_s']}s  peak {s['peak_in_use']}"
+        )
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,28 @@
 import os
 from dataclasses import dataclass, fields
-from typing import Any, Optional
+from typing import Any, Optional, Union, get_args, get_origin
 
 from langchain_core.runnables import RunnableConfig
 
+TRUE_STRINGS = {"1", "true", "yes", "on"}
+FALSE_STRINGS = {"0", "false", "no", "off"}
+
+
+def _coerce(value: Any, field_type: Any) -> Any:
+    """Convert a string (e.g. from an env var) to the field's type; other values pass through."""
+    if not isinstance(value, str):
+        return value
+    if get_origin(field_type) is Union:  # Optional[X]
+        field_type = next(t for t in get_args(field_type) if t is not type(None))
+    if field_type is bool:
+        lowered = value.strip().lower()
+        if lowered in TRUE_STRINGS | FALSE_STRINGS:
+            return lowered in TRUE_STRINGS
+        raise ValueError(f"Expected a boolean, got {value!r}")
+    if field_type in (int, float):
+        return field_type(value)
+    return value
+
 
 @dataclass(kw_only=True)
 class Configuration:
@@ -15,6 +34,25 @@ class Configuration:
     include_search_results: bool = (
         False  # Whether to include search results in the output
     )
+    max_note_shards: int = 1  # Max concurrent note-taking calls per research round
+    reduce_model: str = "claude-3-5-haiku-latest"  # Model that merges shard notes
+    adaptive_search: bool = False  # Search in waves, stopping at coverage_threshold
+    search_wave_size: int = 2  # Concurrent searches per wave (adaptive_search)
+    coverage_threshold: float = 0.9  # Schema coverage that stops searching
+    clean_raw_content: bool = False  # Strip boilerplate from raw content before notes
+    two_phase_search: bool = False  # Search snippets first, fetch raw content for top K
+    raw_content_top_k: int = 5  # URLs whose raw content is fetched (two_phase_search)
+    query_dedup_threshold: float = 0.8  # Token Jaccard for duplicate queries (0 = off)
+    max_loops_without_progress: int = 0  # Stop after K loops with no new info (0 = off)
+    speculative_search: bool = False  # Search for empty fields during reflection
+    llm_timeout: float = 120.0  # Seconds per Anthropic call attempt
+    search_timeout: float = 30.0  # Seconds per Tavily call attempt
+    max_retries: int = 2  # Retries per external call, with jittered backoff
+    hedge_requests: bool = (
+        False  # Duplicate calls outliving their kind's p95 (extra billed requests)
+    )
+    anthropic_api_url: Optional[str] = None  # Anthropic API base URL
+    tavily_api_url: Optional[str] = None  # Tavily API base URL
 
     @classmethod
     def from_runnable_config(
@@ -25,8 +63,11 @@ class Configuration:
             config["configurable"] if config and "configurable" in config else {}
         )
         values: dict[str, Any] = {
-            f.name: os.environ.get(f.name.upper(), configurable.get(f.name))
+            f.name: _coerce(
+                os.environ.get(f.name.upper()) or configurable.get(f.name), f.type
+            )
             for f in fields(cls)
             if f.init
         }
-        return cls(**{k: v for k, v in values.items() if v})
+        # Keep explicit falsy values (False, 0); only unset fields fall back to defaults
+        return cls(**{k: v for k, v in values.items() if v is not None})
@@ -1,5 +1,7 @@
 import asyncio
-from typing import cast, Any, Literal
+import contextvars
+import functools
+from typing import cast, Any, Awaitable, Callable, Literal, Optional
 import json
 
 from tavily import AsyncTavilyClient
@@ -10,12 +12,26 @@ from langgraph.graph import START, END, StateGraph
 from pydantic import BaseModel, Field
 
 from agent.configuration import Configuration
+from agent.resilience import resilient_call
 from agent.state import InputState, OutputState, OverallState
-from agent.utils import deduplicate_sources, format_sources, format_all_notes
+from agent.utils import (
+    deduplicate_sources,
+    changed_fields,
+    clean_sources,
+    dedupe_queries,
+    empty_schema_fields,
+    fields_mentioned,
+    fill_rate,
+    format_sources,
+    format_all_notes,
+    schema_field_terms,
+    shard_sources,
+)
 from agent.prompts import (
     EXTRACTION_PROMPT,
     REFLECTION_PROMPT,
     INFO_PROMPT,
+    NOTES_REDUCE_PROMPT,
     QUERY_WRITER_PROMPT,
 )
 
@@ -26,13 +42,69 @@ rate_limiter = InMemoryRateLimiter(
     check_every_n_seconds=0.1,
     max_bucket_size=10,  # Controls the maximum burst size.
 )
-claude_3_5_sonnet = ChatAnthropic(
-    model="claude-3-5-sonnet-latest", temperature=0, rate_limiter=rate_limiter
+# How an LLM call waits for a rate-limiter token; a caller may set it for the
+# calls made in its context (the service shares tokens fairly between classes)
+llm_acquire: contextvars.ContextVar[Callable[[], Awaitable[Any]]] = (
+    contextvars.ContextVar("llm_acquire", default=rate_limiter.aacquire)
 )
 
+
+@functools.lru_cache
+def get_chat_model(
+    api_url: Optional[str] = None, model: str = "claude-3-5-sonnet-latest"
+) -> ChatAnthropic:
+    """One Claude client per (API base URL, model); call_llm applies the shared rate limiter."""
+    return ChatAnthropic(
+        model=model,
+        temperature=0,
+        max_retries=0,  # Retried by resilient_call
+        **({"anthropic_api_url": api_url} if api_url else {}),
+    )
+
+
+claude_3_5_sonnet = get_chat_model()
+
 # Search
 
-tavily_async_client = AsyncTavilyClient()
+
+@functools.lru_cache
+def get_tavily_client(api_url: Optional[str] = None) -> AsyncTavilyClient:
+    """One Tavily client (and connection pool) per API base URL."""
+    return AsyncTavilyClient(api_base_url=api_url)
+
+
+tavily_async_client = get_tavily_client()
+
+# Resilience
+
+
+def call_llm(configurable: Configuration, make_call, kind: str):
+    """Anthropic call with the configured timeout, retries, hedging and circuit breaker.
+
+    `kind` names the call site (e.g. "notes"); hedging compares against its own p95.
+    """
+    return resilient_call(
+        "anthropic",
+        make_call,
+        timeout=float(configurable.llm_timeout),
+        retries=int(configurable.max_retries),
+        hedge=configurable.hedge_requests,
+        kind=kind,
+        # Wait for a rate-limiter token before taking an LLM pool slot
+        acquire=llm_acquire.get(),
+    )
+
+
+def call_search(configurable: Configuration, make_call, kind: str = "search"):
+    """Tavily call with the configured timeout, retries, hedging and circuit breaker."""
+    return resilient_call(
+        "tavily",
+        make_call,
+        timeout=float(configurable.search_timeout),
+        retries=int(configurable.max_retries),
+        hedge=configurable.hedge_requests,
+        kind=kind,
+    )
 
 
 class Queries(BaseModel):
@@ -54,14 +126,17 @@ class ReflectionOutput(BaseModel):
     reasoning: str = Field(description="Brief explanation of the assessment")
 
 
-def generate_queries(state: OverallState, config: RunnableConfig) -> dict[str, Any]:
+async def generate_queries(
+    state: OverallState, config: RunnableConfig
+) -> dict[str, Any]:
     """Generate search queries based on the user input and extraction schema."""
     # Get configuration
     configurable = Configuration.from_runnable_config(config)
     max_search_queries = configurable.max_search_queries
 
     # Generate search queries
-    structured_llm = claude_3_5_sonnet.with_structured_output(Queries)
+    llm = get_chat_model(configurable.anthropic_api_url)
+    structured_llm = llm.with_structured_output(Queries)
 
     # Format system instructions
     query_instructions = QUERY_WRITER_PROMPT.format(
@@ -72,16 +147,17 @@ def generate_queries(state: OverallState, config: RunnableConfig) -> dict[str, A
     )
 
     # Generate queries
+    messages = [
+        {"role": "system", "content": query_instructions},
+        {
+            "role": "user",
+            "content": "Please generate a list of search queries related to the schema that you want to populate.",
+        },
+    ]
     results = cast(
         Queries,
-        structured_llm.invoke(
-            [
-                {"role": "system", "content": query_instructions},
-                {
-                    "role": "user",
-                    "content": "Please generate a list of search queries related to the schema that you want to populate.",
-                },
-            ]
+        await call_llm(
+            configurable, lambda: structured_llm.ainvoke(messages), kind="queries"
         ),
     )
 
@@ -90,51 +166,388 @@ def generate_queries(state: OverallState, config: RunnableConfig) -> dict[str, A
     return {"search_queries": query_list}
 
 
+async def search_in_waves(
+    queries: list[str],
+    state: OverallState,
+    configurable: Configuration,
+    seen_urls: set[str],
+) -> tuple[list[Optional[dict | Exception]], list[dict]]:
+    """Adaptive search policy: run queries in waves of concurrent searches.
+
+    A wave whose results add neither new URLs nor schema-relevant snippets
+    halves the result budget of the following waves; a wave with at least one
+    productive query leaves it alone. Tavily returns a query's results in one
+    call, so a query's own results can't cut its own budget without a second
+    paid call; the cut applies to the queries that follow. Once the estimated
+    schema coverage (fields already filled in info, plus fields the snippets
+    mention) reaches coverage_threshold, in-flight searches are cancelled and
+    later waves are not started.
+
+    Returns the responses aligned with queries (None when cancelled, the
+    exception when the search failed) and the decision taken after each wave.
+    """
+    search_client = get_tavily_client(configurable.tavily_api_url)
+    wave_size = max(1, int(configurable.search_wave_size))
+    threshold = float(configurable.coverage_threshold)
+    max_results = int(configurable.max_search_results)
+
+    field_terms = schema_field_terms(
+        state.extraction_schema, f"{state.company} company"
+    )
+    num_fields = max(1, len(field_terms))
+    covered = (
+        set(field_terms) - set(empty_schema_fields(state.info, state.extraction_schema))
+        if state.info
+        else set()
+    )
+    seen = set(seen_urls)
+    responses: list[Optional[dict | Exception]] = [None] * len(queries)
+    decisions = []
+
+    for wave, start in enumerate(range(0, len(queries), wave_size), 1):
+        decision = {
+            "loop": state.reflection_steps_taken,
+            "wave": wave,
+            "max_results": max_results,
+        }
+        if len(covered) / num_fields >= threshold:
+            decisions.append(
+                {
+                    **decision,
+                    "action": "skip",
+                    "queries": queries[start:],
+                    "coverage": round(len(covered) / num_fields, 3),
+                }
+            )
+            break
+
+        tasks = {
+            asyncio.create_task(
+                call_search(
+                    configurable,
+                    functools.partial(
+                        search_client.search,
+                        queries[i],
+                        max_results=max_results,
+                        include_raw_content=not configurable.two_phase_search,
+                        topic="general",
+                    ),
+                )
+            ): i
+            for i in range(start, min(start + wave_size, len(queries)))
+        }
+        pending, cancelled = set(tasks), []
+        outcomes = {}  # query -> {"new_urls", "relevant_results"}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        responses[tasks[task]] = task.exception()
+                        continue
+                    response = task.result()
+                    responses[tasks[task]] = response
+                    outcome = outcomes[queries[tasks[task]]] = {
+                        "new_urls": 0,
+                        "relevant_results": 0,
+                    }
+                    for result in response.get("results", []):
+                        if result["url"] not in seen:
+                            seen.add(result["url"])
+                            outcome["new_urls"] += 1
+                        mentioned = fields_mentioned(
+                            f"{result.get('title', '')} {result.get('content', '')}",
+                            field_terms,
+                        )
+                        outcome["relevant_results"] += bool(mentioned)
+                        covered |= mentioned
+                if pending and len(covered) / num_fields >= threshold:
+                    cancelled = [queries[tasks[task]] for task in pending]
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        coverage = round(len(covered) / num_fields, 3)
+        decision.update(
+            {
+                "queries": queries[start : start + wave_size],
+                "per_query": outcomes,
+                "new_urls": sum(o["new_urls"] for o in outcomes.values()),
+                "relevant_results": sum(
+                    o["relevant_results"] for o in outcomes.values()
+                ),
+                "coverage": coverage,
+            }
+        )
+        if cancelled:
+            decisions.append({**decision, "action": "cancel", "cancelled": cancelled})
+            if queries[start + wave_size :]:
+                decisions.append(
+                    {
+                        "loop": state.reflection_steps_taken,
+                        "wave": wave + 1,
+                        "action": "skip",
+                        "queries": queries[start + wave_size :],
+                        "coverage": coverage,
+                    }
+                )
+            break
+        productive = any(
+            o["new_urls"] or o["relevant_results"] for o in outcomes.values()
+        )
+        if outcomes and not productive:
+            max_results = max(1, max_results // 2)
+            decisions.append(
+                {**decision, "action": "shrink", "next_max_results": max_results}
+            )
+        else:
+            decisions.append({**decision, "action": "continue"})
+
+    return responses, decisions
+
+
+async def fetch_top_raw_content(
+    sources: list[dict], state: OverallState, configurable: Configuration
+) -> list[dict]:
+    """Second phase of two-phase search: raw content for the top-ranked sources only.
+
+    Sources are ranked by how many schema fields their snippet mentions, with
+    fields still empty in info counting double and Tavily's score breaking
+    ties. The top raw_content_top_k URLs are fetched with concurrent Tavily
+    extract calls; other sources (and failed extractions) keep only their
+    snippet.
+    """
+    search_client = get_tavily_client(configurable.tavily_api_url)
+    field_terms = schema_field_terms(
+        state.extraction_schema, f"{state.company} company"
+    )
+    empty = set(empty_schema_fields(state.info, state.extraction_schema))
+
+    def rank(source: dict) -> tuple[int, float]:
+        mentioned = fields_mentioned(
+            f"{source.get('title', '')} {source.get('content', '')}", field_terms
+        )
+        return len(mentioned) + len(mentioned & empty), source.get("score") or 0.0
+
+    top_urls = [
+        source["url"]
+        for source in sorted(sources, key=rank, reverse=True)[
+            : int(configurable.raw_content_top_k)
+        ]
+    ]
+    batches = [top_urls[i : i + 5] for i in range(0, len(top_urls), 5)]
+    responses = await asyncio.gather(
+        *(
+            call_search(
+                configurable,
+                functools.partial(search_client.extract, urls=batch),
+                kind="extract",
+            )
+            for batch in batches
+        ),
+        return_exceptions=True,
+    )
+    raw_contents = {
+        result["url"]: result.get("raw_content") or ""
+        for response in responses
+        if isinstance(response, dict)
+        for result in response.get("results", [])
+    }
+    return [
+        {**source, "raw_content": raw_contents.get(source["url"], "")}
+        for source in sources
+    ]
+
+
 async def research_company(
     state: OverallState, config: RunnableConfig
 ) -> dict[str, Any]:
     """Execute a multi-step web search and information extraction process.
 
     This function performs the following steps:
-    1. Executes concurrent web searches using the Tavily API
-    2. Deduplicates and formats the search results
+    1. Skips queries that restate ones already run, then executes concurrent
+       web searches using the Tavily API (in adaptive waves when
+       adaptive_search is set), recording them in query_history
+    2. Deduplicates, cleans and formats the search results; with
+       two_phase_search, searches return snippets only and raw content is then
+       fetched for the top-ranked URLs
+    3. Takes notes on the sources, in concurrent token-balanced shards when
+       max_note_shards > 1, merging the shard notes with the reduce model
     """
 
     # Get configuration
     configurable = Configuration.from_runnable_config(config)
     max_search_results = configurable.max_search_results
+    search_client = get_tavily_client(configurable.tavily_api_url)
+
+    # Responses fetched speculatively during reflection count as already run
+    speculative_docs = list(state.speculative_search_docs or [])
+    history = [
+        {
+            "query": doc.get("query", ""),
+            "status": "speculative",
+            "urls": [r["url"] for r in doc.get("results", [])],
+        }
+        for doc in speculative_docs
+    ]
+
+    # Drop near-duplicates of queries run earlier in this run (or in this batch);
+    # failed and cancelled queries returned nothing, so they may be retried
+    past_queries = [
+        entry["query"]
+        for entry in state.query_history + history
+        if entry["status"] in ("executed", "speculative")
+    ]
+    queries, skipped = dedupe_queries(
+        state.search_queries or [],
+        past_queries,
+        float(configurable.query_dedup_threshold),
+        ignore=state.company,
+    )
+    history += [{**entry, "status": "skipped", "urls": []} for entry in skipped]
 
-    # Search tasks
-    search_tasks = []
-    for query in state.search_queries:
-        search_tasks.append(
-            tavily_async_client.search(
-                query,
-                max_results=max_search_results,
-                include_raw_content=True,
-                topic="general",
-            )
+    seen_urls = {
+        url for entry in state.query_history + history for url in entry["urls"]
+    }
+    if configurable.adaptive_search:
+        responses, decisions = await search_in_waves(
+            queries, state, configurable, seen_urls
         )
+    else:
+        # Search tasks
+        search_tasks = []
+        for query in queries:
+            search_tasks.append(
+                call_search(
+                    configurable,
+                    functools.partial(
+                        search_client.search,
+                        query,
+                        max_results=max_search_results,
+                        include_raw_content=not configurable.two_phase_search,
+                        topic="general",
+                    ),
+                )
+            )
 
-    # Execute all searches concurrently
-    search_docs = await asyncio.gather(*search_tasks)
+        # Execute all searches concurrently, keeping the ones that succeed
+        responses = await asyncio.gather(*search_tasks, return_exceptions=True)
+        decisions = []
+
+    # Add any responses fetched speculatively during reflection
+    search_docs = speculative_docs + [r for r in responses if isinstance(r, dict)]
+    for query, response in zip(queries, responses):
+        if response is None:
+            history.append({"query": query, "status": "cancelled", "urls": []})
+        elif isinstance(response, BaseException):
+            history.append(
+                {
+                    "query": query,
+                    "status": "failed",
+                    "urls": [],
+                    "error": repr(response),
+                }
+            )
+        else:
+            history.append(
+                {
+                    "query": query,
+                    "status": "executed",
+                    "urls": [r["url"] for r in response.get("results", [])],
+                }
+            )
+
+    # How many URLs each query surfaced for the first time in this run
+    seen_urls = {url for entry in state.query_history for url in entry["urls"]}
+    for entry in history:
+        entry["new_urls"] = len(set(entry["urls"]) - seen_urls)
+        seen_urls.update(entry["urls"])
 
-    # Deduplicate and format sources
+    # Deduplicate and shard sources (a single shard unless max_note_shards > 1)
     deduplicated_search_docs = deduplicate_sources(search_docs)
-    source_str = format_sources(
-        deduplicated_search_docs, max_tokens_per_source=1000, include_raw_content=True
-    )
+    if not deduplicated_search_docs:
+        # Nothing new to take notes on (e.g. every query was a duplicate)
+        return {
+            "query_history": history,
+            "search_decisions": decisions,
+            "speculative_search_docs": [],
+        }
+    if configurable.two_phase_search:
+        deduplicated_search_docs = await fetch_top_raw_content(
+            deduplicated_search_docs, state, configurable
+        )
 
-    # Generate structured notes relevant to the extraction schema
-    p = INFO_PROMPT.format(
-        info=json.dumps(state.extraction_schema, indent=2),
-        content=source_str,
-        company=state.company,
-        user_notes=state.user_notes,
+    # Strip boilerplate so the per-source token budget carries real content
+    cleaning_stats = {"tokens_saved": 0}
+    if configurable.clean_raw_content:
+        deduplicated_search_docs = list(
+            clean_sources(
+                deduplicated_search_docs, cleaning_stats, max_tokens_per_source=1000
+            )
+        )
+    shards = shard_sources(
+        deduplicated_search_docs,
+        int(configurable.max_note_shards),
+        max_tokens_per_source=1000,
     )
-    result = await claude_3_5_sonnet.ainvoke(p)
+
+    # Generate structured notes relevant to the extraction schema, one call per shard
+    llm = get_chat_model(configurable.anthropic_api_url)
+    note_tasks = []
+    for shard in shards:
+        source_str = format_sources(
+            shard, max_tokens_per_source=1000, include_raw_content=True
+        )
+        p = INFO_PROMPT.format(
+            info=json.dumps(state.extraction_schema, indent=2),
+            content=source_str,
+            company=state.company,
+            user_notes=state.user_notes,
+        )
+        note_tasks.append(
+            call_llm(configurable, functools.partial(llm.ainvoke, p), kind="notes")
+        )
+    results = await asyncio.gather(*note_tasks, return_exceptions=True)
+    shard_notes = [str(r.content) for r in results if not isinstance(r, BaseException)]
+    if not shard_notes:
+        raise results[0]
+
+    # Merge shard notes with the cheaper reduce model
+    if len(shard_notes) > 1:
+        reduce_llm = get_chat_model(
+            configurable.anthropic_api_url, configurable.reduce_model
+        )
+        p = NOTES_REDUCE_PROMPT.format(
+            info=json.dumps(state.extraction_schema, indent=2),
+            notes=format_all_notes(shard_notes),
+            company=state.company,
+        )
+        try:
+            notes = str(
+                (
+                    await call_llm(
+                        configurable,
+                        functools.partial(reduce_llm.ainvoke, p),
+                        kind="reduce",
+                    )
+                ).content
+            )
+        except Exception:
+            # Keep the shard notes unmerged rather than losing the round
+            notes = format_all_notes(shard_notes)
+    else:
+        notes = shard_notes[0]
+
     state_update = {
-        "completed_notes": [str(result.content)],
+        "completed_notes": [notes],
+        "query_history": history,
+        "search_decisions": decisions,
+        "content_tokens_saved": cleaning_stats["tokens_saved"],
+        "speculative_search_docs": [],
     }
     if configurable.include_search_results:
         state_update["search_results"] = deduplicated_search_docs
@@ -142,8 +555,11 @@ async def research_company(
     return state_update
 
 
-def gather_notes_extract_schema(state: OverallState) -> dict[str, Any]:
-    """Gather notes from the web search and extract the schema fields."""
+async def gather_notes_extract_schema(
+    state: OverallState, config: RunnableConfig
+) -> dict[str, Any]:
+    """Gather notes from the web search and extract the schema fields, tracking progress versus the previous loop."""
+    configurable = Configuration.from_runnable_config(config)
 
     # Format all notes
     notes = format_all_notes(state.completed_notes)
@@ -152,22 +568,77 @@ def gather_notes_extract_schema(state: OverallState) -> dict[str, Any]:
     system_prompt = EXTRACTION_PROMPT.format(
         info=json.dumps(state.extraction_schema, indent=2), notes=notes
     )
-    structured_llm = claude_3_5_sonnet.with_structured_output(state.extraction_schema)
-    result = structured_llm.invoke(
-        [
-            {"role": "system", "content": system_prompt},
-            {
-                "role": "user",
-                "content": "Produce a structured output from these notes.",
-            },
-        ]
+    llm = get_chat_model(configurable.anthropic_api_url)
+    structured_llm = llm.with_structured_output(state.extraction_schema)
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": "Produce a structured output from these notes."},
+    ]
+    result = await call_llm(
+        configurable, lambda: structured_llm.ainvoke(messages), kind="extraction"
     )
-    return {"info": result}
+
+    # Field-level diff against the previous loop's extraction
+    changed = changed_fields(state.info, result, state.extraction_schema)
+    previous_rate = fill_rate(state.info, state.extraction_schema)
+    current_rate = fill_rate(result, state.extraction_schema)
+    progress = {
+        "loop": len(state.loop_progress) + 1,
+        "changed_fields": changed,
+        "fill_rate": round(current_rate, 4),
+        "fill_rate_delta": round(current_rate - previous_rate, 4),
+    }
+    return {
+        "info": result,
+        "loop_progress": [progress],
+        "loops_without_progress": 0 if changed else state.loops_without_progress + 1,
+    }
 
 
-def reflection(state: OverallState) -> dict[str, Any]:
-    """Reflect on the extracted information and generate search queries to find missing information."""
-    structured_llm = claude_3_5_sonnet.with_structured_output(ReflectionOutput)
+async def reflection(state: OverallState, config: RunnableConfig) -> dict[str, Any]:
+    """Reflect on the extracted information and generate search queries to find missing information.
+
+    With speculative_search enabled, and another research round still allowed,
+    searches for the fields that info leaves empty run while the reflection
+    call is in flight. Their results are kept if reflection asks for more
+    research and cancelled otherwise; the queries reflection asks for that
+    restate one of them (per query_dedup_threshold) are dropped.
+    """
+    configurable = Configuration.from_runnable_config(config)
+
+    # No progress for max_loops_without_progress loops: route_from_reflection will end, skip the call
+    max_stalled = int(configurable.max_loops_without_progress)
+    if max_stalled and state.loops_without_progress >= max_stalled:
+        return {}
+
+    llm = get_chat_model(configurable.anthropic_api_url)
+    structured_llm = llm.with_structured_output(ReflectionOutput)
+
+    # Speculative searches, one per empty field
+    speculative_tasks = {}
+    speculative_queries = {}
+    may_continue = state.reflection_steps_taken + 1 <= int(
+        configurable.max_reflection_steps
+    )
+    if configurable.speculative_search and may_continue:
+        search_client = get_tavily_client(configurable.tavily_api_url)
+        properties = state.extraction_schema.get("properties", {})
+        empty_fields = empty_schema_fields(state.info, state.extraction_schema)
+        for name in empty_fields[: int(configurable.max_search_queries)]:
+            topic = properties[name].get("description") or name.replace("_", " ")
+            speculative_queries[name] = f"{state.company} {topic}"
+            speculative_tasks[name] = asyncio.create_task(
+                call_search(
+                    configurable,
+                    functools.partial(
+                        search_client.search,
+                        speculative_queries[name],
+                        max_results=int(configurable.max_search_results),
+                        include_raw_content=not configurable.two_phase_search,
+                        topic="general",
+                    ),
+                )
+            )
 
     # Format reflection prompt
     system_prompt = REFLECTION_PROMPT.format(
@@ -176,24 +647,66 @@ def reflection(state: OverallState) -> dict[str, Any]:
     )
 
     # Invoke
-    result = cast(
-        ReflectionOutput,
-        structured_llm.invoke(
-            [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": "Produce a structured reflection output."},
-            ]
-        ),
-    )
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": "Produce a structured reflection output."},
+    ]
+    try:
+        result = cast(
+            ReflectionOutput,
+            await call_llm(
+                configurable,
+                lambda: structured_llm.ainvoke(messages),
+                kind="reflection",
+            ),
+        )
+    except BaseException:
+        for task in speculative_tasks.values():
+            task.cancel()
+        raise
 
     if result.is_satisfactory:
+        # Discard the speculation, cancelling searches still in flight
+        for task in speculative_tasks.values():
+            task.cancel()
+        await asyncio.gather(*speculative_tasks.values(), return_exceptions=True)
         return {"is_satisfactory": result.is_satisfactory}
     else:
-        return {
+        state_update = {
             "is_satisfactory": result.is_satisfactory,
             "search_queries": result.search_queries,
             "reflection_steps_taken": state.reflection_steps_taken + 1,
         }
+        if speculative_tasks:
+            responses = await asyncio.gather(
+                *speculative_tasks.values(), return_exceptions=True
+            )
+            fetched = {
+                name: {**response, "query": speculative_queries[name]}
+                for name, response in zip(speculative_tasks, responses)
+                if isinstance(response, dict)
+            }
+            state_update["speculative_search_docs"] = list(fetched.values())
+            # Every field reflection asks for was already searched: skip the extra round trip
+            covered = {
+                name.lower() for name, doc in fetched.items() if doc.get("results")
+            }
+            missing = {name.lower() for name in result.missing_fields}
+            if missing and missing <= covered:
+                state_update["search_queries"] = []
+            else:
+                # Drop the queries that restate a speculative search that found results
+                queries, skipped = dedupe_queries(
+                    result.search_queries,
+                    [doc["query"] for doc in fetched.values() if doc.get("results")],
+                    float(configurable.query_dedup_threshold),
+                    ignore=state.company,
+                )
+                state_update["search_queries"] = queries
+                state_update["query_history"] = [
+                    {**entry, "status": "skipped", "urls": []} for entry in skipped
+                ]
+        return state_update
 
 
 def route_from_reflection(
@@ -207,6 +720,11 @@ def route_from_reflection(
     if state.is_satisfactory:
         return END
 
+    # If recent loops changed nothing in info, more research is unlikely to help
+    max_stalled = int(configurable.max_loops_without_progress)
+    if max_stalled and state.loops_without_progress >= max_stalled:
+        return END
+
     # If results aren't satisfactory but we haven't hit max steps, continue research
     if state.reflection_steps_taken <= configurable.max_reflection_steps:
         return "research_company"
@@ -62,6 +62,28 @@ Please provide detailed research notes that:
 
 Remember: Don't try to format the output to match the schema - just take clear notes that capture all relevant information."""
 
+NOTES_REDUCE_PROMPT = """You are doing web research on a company, {company}.
+
+The following schema shows the type of information we're interested in:
+
+<schema>
+{info}
+</schema>
+
+Research notes were taken separately on different batches of sources. Merge them into one set of notes:
+
+<batch_notes>
+{notes}
+</batch_notes>
+
+Your merged notes should:
+1. Keep every specific fact, date, and figure relevant to the schema
+2. Remove duplicates, keeping the most specific version of each fact
+3. Flag facts on which the batches disagree instead of choosing one silently
+4. Note when important information is missing from all batches
+
+Remember: Don't try to format the output to match the schema - just merge the notes."""
+
 REFLECTION_PROMPT = """You are a research analyst tasked with reviewing the quality and completeness of extracted company information.
 
 Compare the extracted information with the required schema:
@@ -0,0 +1,307 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Transient errors without an HTTP status, matched by class name (or base class name) across SDKs
+RETRYABLE_ERRORS = {
+    "APIConnectionError",  # anthropic, includes APITimeoutError
+    "TransportError",  # httpx network errors
+    "UsageLimitExceededError",  # tavily's 429
+}
+MIN_HEDGE_SAMPLES = 20  # latencies of a call kind observed before hedging kicks in
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while its circuit breaker is open."""
+
+
+@dataclass
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures; lets one probe through after `reset_timeout` seconds."""
+
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+    failures: int = 0
+    opened_at: Optional[float] = None
+    probing: bool = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        """End a half-open probe that produced no verdict (e.g. cancelled) so the next call can probe."""
+        self.probing = False
+
+    def record_success(self) -> None:
+        self.failures, self.opened_at, self.probing = 0, None, False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            self.opened_at, self.probing = time.monotonic(), False
+
+
+@dataclass
+class Provider:
+    """Per-provider resilience state: breaker, recent latencies per call kind, counters and an optional concurrency pool."""
+
+    name: str
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    # Kinds (e.g. "queries" vs "notes") differ by orders of magnitude, so each has its own history
+    latencies: dict[str, deque] = field(default_factory=dict)
+    stats: dict = field(
+        default_factory=lambda: dict.fromkeys(
+            [
+                "calls",
+                "failures",
+                "retries",
+                "timeouts",
+                "hedges",
+                "hedge_wins",
+                "rejected",
+            ],
+            0,
+        )
+    )
+    limit: Optional[int] = None
+    in_use: int = 0
+    peak_in_use: int = 0
+    busy_s: float = 0.0  # slot-seconds spent in calls
+    slot_wait_s: float = 0.0  # seconds callers spent waiting for a free slot
+    _waiters: deque = field(default_factory=deque)
+
+    def has_free_slot(self) -> bool:
+        return self.limit is None or self.in_use < self.limit
+
+    def _wake_waiters(self) -> None:
+        # Waiters re-check has_free_slot(), so waking all is safe after a release or a resize
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the provider's `limit` slots (unbounded when limit is None) for a call."""
+        waited = time.monotonic()
+        while not self.has_free_slot():
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+        started = time.monotonic()
+        self.slot_wait_s += started - waited
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        try:
+            yield
+        finally:
+            self.in_use -= 1
+            self.busy_s += time.monotonic() - started
+            self._wake_waiters()
+
+    def record_latency(self, kind: str, seconds: float) -> None:
+        self.latencies.setdefault(kind, deque(maxlen=200)).append(seconds)
+
+    def p95(self, kind: str = "default") -> Optional[float]:
+        latencies = self.latencies.get(kind, ())
+        if len(latencies) < MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+_providers: dict[str, Provider] = {}
+
+
+def get_provider(name: str) -> Provider:
+    if name not in _providers:
+        _providers[name] = Provider(name)
+    return _providers[name]
+
+
+def set_concurrency_limit(name: str, limit: Optional[int]) -> None:
+    """
+    Cap the provider's concurrent calls (its worker pool); None removes the cap.
+
+    The pool is resized in place: calls already holding slots keep them and
+    no new call starts until in_use drops below the new limit. Restarts
+    peak_in_use.
+    """
+    provider = get_provider(name)
+    provider.limit, provider.peak_in_use = limit or None, provider.in_use
+    provider._wake_waiters()
+
+
+def provider_stats() -> dict[str, dict]:
+    """Counters, breaker state, p95 latency per call kind and pool usage of every provider used so far."""
+    return {
+        name: {
+            **p.stats,
+            "breaker": p.breaker.state,
+            "p95_s": {kind: p.p95(kind) for kind in sorted(p.latencies)},
+            "limit": p.limit,
+            "in_use": p.in_use,
+            "peak_in_use": p.peak_in_use,
+            "busy_s": round(p.busy_s, 3),
+            "slot_wait_s": round(p.slot_wait_s, 3),
+        }
+        for name, p in _providers.items()
+    }
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Timeouts, network errors, 408/409/429 and 5xx; client and programming errors fail immediately."""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None) or getattr(
+        getattr(exc, "response", None), "status_code", None
+    )
+    if isinstance(status, int):
+        return status in (408, 409, 429) or status >= 500
+    return any(cls.__name__ in RETRYABLE_ERRORS for cls in type(exc).__mro__)
+
+
+async def _in_slot(
+    provider: Provider,
+    make_call: Callable[[], Awaitable[T]],
+    acquire: Optional[Callable[[], Awaitable[Any]]],
+) -> T:
+    """One request: rate-limiter token first, then a pool slot for the request itself."""
+    if acquire is not None:
+        await acquire()
+    async with provider.slot():
+        return await make_call()
+
+
+async def _hedged(
+    provider: Provider,
+    make_call: Callable[[], Awaitable[T]],
+    hedge_after: Optional[float],
+    acquire: Optional[Callable[[], Awaitable[Any]]],
+) -> T:
+    """Run the call; if it outlives hedge_after seconds and a slot is free, race a duplicate."""
+    primary = asyncio.ensure_future(make_call())
+    pending = {primary}
+    error: Optional[BaseException] = None
+    try:
+        if hedge_after is not None:
+            done, _ = await asyncio.wait(pending, timeout=hedge_after)
+            # A hedge takes its own slot and is skipped when the pool is full
+            if not done and provider.has_free_slot():
+                provider.stats["hedges"] += 1
+                pending.add(
+                    asyncio.ensure_future(_in_slot(provider, make_call, acquire))
+                )
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        provider.stats["hedge_wins"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def resilient_call(
+    provider_name: str,
+    make_call: Callable[[], Awaitable[T]],
+    timeout: Optional[float] = None,
+    retries: int = 2,
+    hedge: bool = False,
+    backoff_base: float = 0.5,
+    backoff_cap: float = 10.0,
+    acquire: Optional[Callable[[], Awaitable[Any]]] = None,
+    kind: str = "default",
+) -> T:
+    """
+    Call an external provider with a timeout, jittered retries, p95 hedging and a circuit breaker.
+
+    Args:
+        provider_name: provider whose breaker and latency history apply (e.g. "anthropic")
+        make_call: zero-argument factory returning a fresh awaitable per attempt
+        timeout: seconds per attempt (including any hedge) once its slot is held, None for no limit
+        retries: retries after the first attempt, for retryable errors only
+        hedge: whether to race a duplicate request once the attempt passes the p95 of its kind;
+            a hedge that fires is a second billed request (for LLM calls, doubled tokens)
+        acquire: awaited before every request (e.g. a rate limiter's aacquire), before a slot is taken
+        kind: call site or kind whose latency history sets the hedge threshold (e.g. "notes")
+
+    Returns:
+        The first successful result; raises the last error otherwise
+    """
+    provider = get_provider(provider_name)
+    breaker = provider.breaker
+    for attempt in range(retries + 1):
+        probe = breaker.state == "half_open"
+        if not breaker.allow():
+            provider.stats["rejected"] += 1
+            raise CircuitOpenError(f"{provider_name} circuit breaker is open")
+        try:
+            # Rate-limited time is neither slot time nor part of the timeout
+            if acquire is not None:
+                await acquire()
+            async with provider.slot():
+                provider.stats["calls"] += 1
+                started = time.monotonic()
+                result = await asyncio.wait_for(
+                    _hedged(
+                        provider,
+                        make_call,
+                        provider.p95(kind) if hedge else None,
+                        acquire,
+                    ),
+                    timeout,
+                )
+        except Exception as e:
+            provider.stats["failures"] += 1
+            if isinstance(e, asyncio.TimeoutError):
+                provider.stats["timeouts"] += 1
+            if not is_retryable(e):
+                # Neither a verdict on the provider's health (4xx, local errors such as a
+                # closed event loop) nor a failure: leave the breaker as it is
+                raise
+            breaker.record_failure()
+            if attempt == retries:
+                raise
+            provider.stats["retries"] += 1
+            # Full jitter: spread retries so concurrent callers don't retry in lockstep
+            await asyncio.sleep(
+                random.uniform(0, min(backoff_cap, backoff_base * 2**attempt))
+            )
+        else:
+            provider.record_latency(kind, time.monotonic() - started)
+            breaker.record_success()
+            return result
+        finally:
+            # Cancellation (or any other BaseException) must not leave the probe held forever
+            if probe:
+                breaker.release_probe()
+    raise AssertionError("unreachable")
@@ -0,0 +1,589 @@
+"""
+Local enrichment service: one process running many graph jobs on one event loop.
+
+Endpoints (JSON over HTTP/1.1, on TCP or a Unix socket):
+    POST   /jobs              {"company", "extraction_schema"?, "user_notes"?, "config"?, "priority"?}
+                              -> 202 {"job_id", "status", "queue_position"}; 429 + Retry-After when the queue is full
+    GET    /jobs/<id>         status, timings, and the result or error once finished
+    GET    /jobs/<id>/events  NDJSON stream of status and node-completion events until the job finishes
+    DELETE /jobs/<id>         cancel a queued or running job
+    GET    /metrics           queue depth, running jobs, wait/run latency percentiles, provider stats
+
+Priority classes share both the worker slots and the LLM rate limit by weight.
+Stride scheduling hands a free worker slot, and separately each rate-limiter
+token, to the class that has used the least of its share. A busy batch class
+cannot starve interactive jobs of slots, and a class whose few jobs make many
+LLM calls cannot take more than its share of the provider rate limit.
+
+Usage:
+    python -m agent.service --port 8765 --concurrency 8 --max-queue 200
+    python -m agent.service --unix-socket /tmp/enrichment.sock --weights interactive=4,batch=1
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, fields
+from typing import Any, Awaitable, Callable, Optional
+
+from agent.graph import graph, llm_acquire, rate_limiter
+from agent.resilience import provider_stats
+from agent.state import OutputState
+
+DEFAULT_WEIGHTS = {"interactive": 3, "batch": 1}
+FINISHED_JOBS_KEPT = 1000  # finished jobs kept for polling, oldest dropped first
+TERMINAL = ("succeeded", "failed", "cancelled")
+OUTPUT_KEYS = [f.name for f in fields(OutputState)]
+MAX_BODY_BYTES = 1_000_000
+MAX_LINE_BYTES = 8192  # request line or header line
+MAX_HEADERS = 100
+# Tuning knobs a job may set; endpoints and models stay with the service, since
+# jobs run with its API keys and every distinct URL/model adds a cached client
+JOB_CONFIG_KEYS = {
+    "max_search_queries",
+    "max_search_results",
+    "max_reflection_steps",
+    "include_search_results",
+    "max_note_shards",
+    "adaptive_search",
+    "search_wave_size",
+    "coverage_threshold",
+    "clean_raw_content",
+    "two_phase_search",
+    "raw_content_top_k",
+    "query_dedup_threshold",
+    "max_loops_without_progress",
+    "speculative_search",
+    "llm_timeout",
+    "search_timeout",
+    "max_retries",
+    "hedge_requests",
+}
+
+
+@dataclass
+class Job:
+    company: str
+    extraction_schema: Optional[dict[str, Any]] = None
+    user_notes: Any = None
+    config: dict[str, Any] = field(default_factory=dict)
+    priority: str = "batch"
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = "queued"
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    events: list[dict] = field(default_factory=list)
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+
+    def emit(self, event: str, **data) -> None:
+        self.events.append({"event": event, "t": round(time.time(), 3), **data})
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def summary(self) -> dict:
+        info = {
+            "job_id": self.job_id,
+            "company": self.company,
+            "priority": self.priority,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "nodes_completed": [e["node"] for e in self.events if e["event"] == "node"],
+        }
+        if self.status == "succeeded":
+            info["result"] = self.result
+        if self.error:
+            info["error"] = self.error
+        return info
+
+
+class Stride:
+    """Stride scheduling state: each class's pass grows by 1/weight per unit it takes."""
+
+    def __init__(self, weights: dict[str, float]):
+        self.weights = weights
+        self.passes: dict[str, float] = dict.fromkeys(weights, 0.0)
+
+    def join(self, name: str, active: list[str]) -> None:
+        """A class returning from idle starts at the current minimum, not with banked credit."""
+        self.passes[name] = max(
+            self.passes[name], min((self.passes[n] for n in active), default=0.0)
+        )
+
+    def take(self, candidates: list[str]) -> str:
+        name = min(candidates, key=lambda name: self.passes[name])
+        self.passes[name] += 1 / self.weights[name]
+        return name
+
+
+class FairQueue:
+    """Bounded multi-class queue; get() serves the class with the lowest stride pass."""
+
+    def __init__(self, weights: dict[str, float], max_size: int):
+        self.weights = weights
+        self.max_size = max_size
+        self.queues: dict[str, deque[Job]] = {name: deque() for name in weights}
+        self.stride = Stride(weights)
+        self._ready = asyncio.Condition()
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self.queues.values())
+
+    def put_nowait(self, job: Job) -> int:
+        """Enqueue job, returning its position; raises asyncio.QueueFull at capacity. Follow with notify()."""
+        if len(self) >= self.max_size:
+            raise asyncio.QueueFull
+        queue = self.queues[job.priority]
+        if not queue:
+            self.stride.join(
+                job.priority, [name for name, q in self.queues.items() if q]
+            )
+        queue.append(job)
+        return len(self)
+
+    async def notify(self) -> None:
+        async with self._ready:
+            self._ready.notify()
+
+    def remove(self, job: Job) -> bool:
+        try:
+            self.queues[job.priority].remove(job)
+            return True
+        except ValueError:
+            return False
+
+    async def get(self) -> Job:
+        async with self._ready:
+            await self._ready.wait_for(lambda: len(self) > 0)
+            name = self.stride.take([name for name, q in self.queues.items() if q])
+            return self.queues[name].popleft()
+
+
+class FairLimiter:
+    """
+    Hands out an underlying rate limiter's tokens to waiting classes by stride.
+
+    One grant loop at a time waits for a token from `acquire`, then gives it to
+    the waiting class with the lowest pass, so each class gets its weighted
+    share of the provider rate however many calls its jobs make.
+    """
+
+    def __init__(
+        self, acquire: Callable[[], Awaitable[Any]], weights: dict[str, float]
+    ):
+        self._acquire = acquire
+        self.stride = Stride(weights)
+        self.waiting: dict[str, deque[asyncio.Future]] = {n: deque() for n in weights}
+        self.granted: dict[str, int] = dict.fromkeys(weights, 0)
+        self._granter: Optional[asyncio.Task] = None
+
+    def _active(self) -> list[str]:
+        for queue in self.waiting.values():
+            while queue and queue[0].done():  # cancelled waiters
+                queue.popleft()
+        return [name for name, q in self.waiting.items() if q]
+
+    async def acquire(self, name: str) -> None:
+        if not self.waiting[name]:
+            self.stride.join(name, self._active())
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiting[name].append(waiter)
+        if self._granter is None or self._granter.done():
+            self._granter = asyncio.create_task(self._grant())
+        await waiter
+
+    async def _grant(self) -> None:
+        while self._active():
+            await self._acquire()
+            # Chosen after the token arrives, among the classes still waiting then
+            while active := self._active():
+                name = self.stride.take(active)
+                waiter = self.waiting[name].popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    self.granted[name] += 1
+                    break
+
+
+def percentiles(values) -> dict[str, Optional[float]]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"p50": None, "p95": None, "max": None}
+    pick = lambda q: round(ordered[int(q * (len(ordered) - 1))], 3)  # noqa: E731
+    return {"p50": pick(0.5), "p95": pick(0.95), "max": round(ordered[-1], 3)}
+
+
+class EnrichmentService:
+    """Runs submitted jobs through the graph with `concurrency` workers on the current event loop."""
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        max_queue: int = 200,
+        weights: Optional[dict[str, float]] = None,
+    ):
+        self.concurrency = concurrency
+        self.queue = FairQueue(weights or DEFAULT_WEIGHTS, max_queue)
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self.running: dict[str, Job] = {}
+        self.started_at = time.time()
+        self.counts = {"submitted": 0, "rejected": 0} | dict.fromkeys(TERMINAL, 0)
+        self.wait_s = {name: deque(maxlen=1000) for name in self.queue.weights}
+        self.run_s = {name: deque(maxlen=1000) for name in self.queue.weights}
+        self.busy_s = 0.0
+        self.llm_limiter = FairLimiter(rate_limiter.aacquire, self.queue.weights)
+        self._workers: list[asyncio.Task] = []
+
+    # Jobs
+
+    async def submit(self, payload: dict) -> Job:
+        """Validate and enqueue a job; raises ValueError on bad input and asyncio.QueueFull when full."""
+        if not isinstance(payload.get("company"), str) or not payload["company"]:
+            raise ValueError("'company' must be a non-empty string")
+        priority = payload.get("priority", "batch")
+        if priority not in self.queue.weights:
+            raise ValueError(f"'priority' must be one of {sorted(self.queue.weights)}")
+        for key, kind in (("extraction_schema", dict), ("config", dict)):
+            if payload.get(key) is not None and not isinstance(payload[key], kind):
+                raise ValueError(f"'{key}' must be an object")
+        disallowed = set(payload.get("config") or {}) - JOB_CONFIG_KEYS
+        if disallowed:
+            raise ValueError(f"config keys not allowed: {sorted(disallowed)}")
+        job = Job(
+            company=payload["company"],
+            extraction_schema=payload.get("extraction_schema"),
+            user_notes=payload.get("user_notes"),
+            config=payload.get("config") or {},
+            priority=priority,
+        )
+        try:
+            position = self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.counts["rejected"] += 1
+            raise
+        self.counts["submitted"] += 1
+        self.jobs[job.job_id] = job
+        self._forget_finished()
+        job.emit("status", status="queued", queue_position=position)
+        await self.queue.notify()
+        return job
+
+    def cancel(self, job: Job) -> bool:
+        if job.status == "queued" and self.queue.remove(job):
+            self._finish(job, "cancelled")
+            return True
+        if job.status == "running" and job.task:
+            job.task.cancel()
+            return True
+        return False
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up, from recent run times."""
+        recent = [s for runs in self.run_s.values() for s in runs]
+        mean_run = sum(recent) / len(recent) if recent else 30.0
+        return max(1, round(mean_run * len(self.queue) / self.concurrency))
+
+    def _forget_finished(self) -> None:
+        finished = [j for j in self.jobs.values() if j.status in TERMINAL]
+        for job in finished[: max(0, len(finished) - FINISHED_JOBS_KEPT)]:
+            del self.jobs[job.job_id]
+
+    def _finish(self, job: Job, status: str, **data) -> None:
+        job.status, job.finished_at = status, time.time()
+        self.counts[status] += 1
+        job.emit("status", status=status, **data)
+
+    async def _run(self, job: Job) -> None:
+        job.status, job.started_at = "running", time.time()
+        self.wait_s[job.priority].append(job.started_at - job.submitted_at)
+        job.emit("status", status="running")
+        # The job's LLM calls (in this task's context) draw tokens through the fair limiter
+        llm_acquire.set(functools.partial(self.llm_limiter.acquire, job.priority))
+        graph_input = {"company": job.company, "user_notes": job.user_notes}
+        if job.extraction_schema:
+            graph_input["extraction_schema"] = job.extraction_schema
+        try:
+            async for mode, chunk in graph.astream(
+                graph_input,
+                config={"configurable": job.config},
+                stream_mode=["updates", "values"],
+            ):
+                if mode == "updates":
+                    for node in chunk:
+                        job.emit("node", node=node)
+                else:
+                    job.result = {k: chunk[k] for k in OUTPUT_KEYS if k in chunk}
+        except asyncio.CancelledError:
+            self._finish(job, "cancelled")
+        except Exception as e:
+            job.error = repr(e)
+            self._finish(job, "failed", error=job.error)
+        else:
+            self._finish(job, "succeeded")
+        finally:
+            self.running.pop(
+                job.job_id, None
+            )  # before busy_s, so metrics() never counts it twice
+            run_s = time.time() - job.started_at
+            self.run_s[job.priority].append(run_s)
+            self.busy_s += run_s
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self.queue.get()
+            self.running[job.job_id] = job
+            job.task = asyncio.create_task(self._run(job))
+            try:
+                # A DELETE cancels job.task only; _run records it and returns normally
+                await job.task
+            finally:
+                self.running.pop(job.job_id, None)
+
+    def start(self) -> None:
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._workers + [j.task for j in self.running.values() if j.task]:
+            task.cancel()
+        if self.llm_limiter._granter:
+            self.llm_limiter._granter.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def metrics(self) -> dict:
+        now = time.time()
+        uptime = now - self.started_at
+        busy_s = self.busy_s + sum(
+            now - job.started_at for job in self.running.values() if job.started_at
+        )
+        return {
+            "uptime_s": round(uptime, 1),
+            "concurrency": self.concurrency,
+            "running": len(self.running),
+            "utilization": round(busy_s / (uptime * self.concurrency), 4),
+            "queue_depth": len(self.queue),
+            "queue_capacity": self.queue.max_size,
+            "queue_depth_by_priority": {
+                name: len(q) for name, q in self.queue.queues.items()
+            },
+            "jobs": self.counts,
+            "queue_wait_s": {n: percentiles(v) for n, v in self.wait_s.items()},
+            "run_s": {n: percentiles(v) for n, v in self.run_s.items()},
+            "llm_tokens_granted": dict(self.llm_limiter.granted),
+            "providers": provider_stats(),
+        }
+
+    # HTTP
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            try:
+                request_line = (await reader.readline()).decode("latin-1").split()
+            except ValueError:  # longer than the reader's limit
+                return await respond(writer, 400, {"error": "request line too long"})
+            headers = {}
+            try:
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    if len(headers) >= MAX_HEADERS:
+                        raise ValueError
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+            except ValueError:
+                return await respond(
+                    writer, 431, {"error": "request header fields too large"}
+                )
+            if len(request_line) < 2:
+                return
+            method, path = request_line[0], request_line[1].split("?", 1)[0]
+            try:
+                length = int(headers.get("content-length", 0))
+            except ValueError:
+                return await respond(writer, 400, {"error": "invalid Content-Length"})
+            if length < 0:
+                return await respond(writer, 400, {"error": "invalid Content-Length"})
+            if length > MAX_BODY_BYTES:
+                return await respond(
+                    writer, 413, {"error": f"body over {MAX_BODY_BYTES} bytes"}
+                )
+            body = await reader.readexactly(length)
+            await self._route(method, path.rstrip("/"), body, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(
+        self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter
+    ) -> None:
+        parts = path.strip("/").split("/")
+        job = (
+            self.jobs.get(parts[1]) if len(parts) >= 2 and parts[0] == "jobs" else None
+        )
+        if method == "POST" and parts == ["jobs"]:
+            try:
+                job = await self.submit(json.loads(body or b"{}"))
+            except (ValueError, AttributeError) as e:
+                return await respond(writer, 400, {"error": str(e)})
+            except asyncio.QueueFull:
+                retry_after = self.retry_after()
+                return await respond(
+                    writer,
+                    429,
+                    {"error": "queue full", "retry_after_s": retry_after},
+                    {"Retry-After": str(retry_after)},
+                )
+            return await respond(
+                writer,
+                202,
+                {
+                    "job_id": job.job_id,
+                    "status": job.status,
+                    "queue_position": job.events[0]["queue_position"],
+                },
+            )
+        if method == "GET" and parts == ["metrics"]:
+            return await respond(writer, 200, self.metrics())
+        if job is None:
+            return await respond(writer, 404, {"error": "not found"})
+        if method == "GET" and len(parts) == 2:
+            return await respond(writer, 200, job.summary())
+        if method == "DELETE" and len(parts) == 2:
+            return await respond(
+                writer, 200 if self.cancel(job) else 409, job.summary()
+            )
+        if method == "GET" and parts[2:] == ["events"]:
+            return await self._stream_events(job, writer)
+        await respond(writer, 404, {"error": "not found"})
+
+    async def _stream_events(self, job: Job, writer: asyncio.StreamWriter) -> None:
+        """NDJSON of the job's events so far, then live ones until it finishes; ends with the summary."""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        sent = 0
+        while True:
+            changed = job.changed
+            for event in job.events[sent:]:
+                writer.write(json.dumps(event, default=str).encode() + b"\n")
+            sent = len(job.events)
+            await writer.drain()
+            if job.status in TERMINAL:
+                break
+            await changed.wait()
+        writer.write(
+            json.dumps({"event": "done", **job.summary()}, default=str).encode() + b"\n"
+        )
+        await writer.drain()
+
+
+REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    409: "Conflict",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    431: "Request Header Fields Too Large",
+}
+
+
+async def respond(
+    writer: asyncio.StreamWriter,
+    status: int,
+    payload: dict,
+    headers: Optional[dict[str, str]] = None,
+) -> None:
+    body = json.dumps(payload, default=str).encode()
+    head = [
+        f"HTTP/1.1 {status} {REASONS[status]}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        "Connection: close",
+        *(f"{k}: {v}" for k, v in (headers or {}).items()),
+    ]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+    await writer.drain()
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    unix_socket: Optional[str] = None,
+    **service_kwargs,
+) -> None:
+    service = EnrichmentService(**service_kwargs)
+    service.start()
+    if unix_socket:
+        server = await asyncio.start_unix_server(
+            service.handle, path=unix_socket, limit=MAX_LINE_BYTES
+        )
+    else:
+        server = await asyncio.start_server(
+            service.handle, host, port, limit=MAX_LINE_BYTES
+        )
+    where = unix_socket or f"http://{host}:{port}"
+    print(f"enrichment service on {where} (concurrency {service.concurrency})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def parse_weights(value: str) -> dict[str, float]:
+    weights = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve enrichment jobs over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--unix-socket", default=None, help="Listen on a Unix socket instead of TCP"
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="Jobs run at once")
+    parser.add_argument(
+        "--max-queue", type=int, default=200, help="Queued jobs before 429s"
+    )
+    parser.add_argument(
+        "--weights",
+        type=parse_weights,
+        default=DEFAULT_WEIGHTS,
+        help="Priority classes, e.g. interactive=3,batch=1",
+    )
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(
+            serve(
+                args.host,
+                args.port,
+                args.unix_socket,
+                concurrency=args.concurrency,
+                max_queue=args.max_queue,
+                weights=args.weights,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@ from dataclasses import dataclass, field
 from typing import Any, Optional, Annotated
 import operator
 
-
 DEFAULT_EXTRACTION_SCHEMA = {
     "title": "CompanyInfo",
     "description": "Basic information about a company",
@@ -87,6 +86,24 @@ class OverallState:
     reflection_steps_taken: int = field(default=0)
     "Number of times the reflection node has been executed"
 
+    query_history: Annotated[list, operator.add] = field(default_factory=list)
+    "Queries run (or skipped as near-duplicates) in this run, with the URLs each returned"
+
+    search_decisions: Annotated[list, operator.add] = field(default_factory=list)
+    "Adaptive search policy decisions per wave: result budget, yield, coverage and action"
+
+    content_tokens_saved: Annotated[int, operator.add] = field(default=0)
+    "Estimated raw-content tokens removed as boilerplate over the run"
+
+    loop_progress: Annotated[list, operator.add] = field(default_factory=list)
+    "Per-extraction fields changed, fill rate and fill-rate delta versus the previous loop"
+
+    loops_without_progress: int = field(default=0)
+    "Consecutive extractions that changed no field in info"
+
+    speculative_search_docs: list[dict] = field(default=None)
+    "Search responses fetched speculatively during reflection, used by the next research round"
+
 
 @dataclass(kw_only=True)
 class OutputState:
@@ -105,3 +122,9 @@ class OutputState:
 
     search_results: list[dict] = field(default=None)
     "List of search results"
+
+    search_decisions: list[dict] = field(default_factory=list)
+    "Adaptive search policy decisions per wave: result budget, yield, coverage and action"
+
+    content_tokens_saved: int = field(default=0)
+    "Estimated raw-content tokens removed as boilerplate over the run"
@@ -1,3 +1,34 @@
+import hashlib
+import html
+import json
+import re
+from typing import Iterable, Iterator
+
+QUERY_STOPWORDS = {
+    "a",
+    "an",
+    "and",
+    "are",
+    "as",
+    "at",
+    "by",
+    "for",
+    "from",
+    "in",
+    "is",
+    "of",
+    "on",
+    "or",
+    "the",
+    "to",
+    "was",
+    "what",
+    "when",
+    "who",
+    "with",
+}
+
+
 def deduplicate_sources(search_response: dict | list[dict]) -> list[dict]:
     """
     Takes either a single search response or list of responses from Tavily API and de-duplicates them based on the URL.
@@ -36,6 +67,143 @@ def deduplicate_sources(search_response: dict | list[dict]) -> list[dict]:
     return unique_sources_list
 
 
+# Script/style blocks are cut by _strip_blocks (linear even when closing tags are missing)
+BLOCK_OPEN_PATTERN = re.compile(r"<(script|style)\b", re.IGNORECASE)
+BLOCK_CLOSE_PATTERNS = {
+    tag: re.compile(rf"</{tag}\b[^>]{{0,100}}>", re.IGNORECASE)
+    for tag in ("script", "style")
+}
+# Other markup remnants: HTML tags, markdown images, links (kept as text),
+# heading/list/quote/table marks at line starts and bold markers. Every
+# repetition is bounded so a malformed page can't make a pattern quadratic.
+MARKUP_PATTERNS = [
+    (re.compile(r"<[^>\n]{1,500}>"), " "),
+    (re.compile(r"!\[[^\]\n]{0,500}\]\([^)\n]{0,2000}\)"), " "),
+    (re.compile(r"\[([^\]\n]{0,500})\]\([^)\n]{0,2000}\)"), r"\1"),
+    (re.compile(r"^\s*(#{1,6}|[*\-+>|]+)\s*", re.MULTILINE), ""),
+    (re.compile(r"\*\*|__"), ""),
+]
+BOILERPLATE_PATTERN = re.compile(
+    r"\b(cookies?|accept all|privacy policy|terms of (use|service)|all rights reserved"
+    r"|subscribe|sign (in|up)|log ?in|newsletter|skip to (main )?content|share (on|this))\b",
+    re.IGNORECASE,
+)
+MIN_LINE_WORDS = 4  # shorter lines are treated as navigation/menu items...
+MIN_NAME_TOKENS = 2  # ...unless they hold a digit, a "key: value" pair or a name
+
+
+def _is_short_fact(line: str, words: list[str]) -> bool:
+    """Short lines worth keeping: "CEO: Dario Amodei", "Series C", "Founded 2021"."""
+    if ":" in line.rstrip(":") or any(ch.isdigit() for ch in line):
+        return True
+    return sum(word[0].isupper() for word in words) >= MIN_NAME_TOKENS
+
+
+def _strip_blocks(text: str) -> str:
+    """Remove <script>/<style> blocks; an unclosed opening tag is left to the tag pattern."""
+    parts, pos, unclosed = [], 0, set()
+    while match := BLOCK_OPEN_PATTERN.search(text, pos):
+        tag = match.group(1).lower()
+        close = (
+            None
+            if tag in unclosed
+            else BLOCK_CLOSE_PATTERNS[tag].search(text, match.end())
+        )
+        if close is None:
+            # No closing tag after this one means none after any later one either
+            unclosed.add(tag)
+            parts.append(text[pos : match.end()])
+            pos = match.end()
+            continue
+        parts.append(text[pos : match.start()])
+        parts.append(" ")
+        pos = close.end()
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def _is_low_information(line: str) -> bool:
+    words = line.split()
+    if len(words) < MIN_LINE_WORDS and not _is_short_fact(line, words):
+        return True
+    if len(words) < 25 and BOILERPLATE_PATTERN.search(line):
+        return True
+    alphanumeric = sum(ch.isalnum() for ch in line)
+    return alphanumeric < 0.5 * len(line)
+
+
+def clean_raw_content(
+    raw_content: str, seen_lines: set[bytes], stats: dict | None = None
+) -> str:
+    """
+    Strip boilerplate from one page's raw content in a single pass over its lines.
+
+    Entities are decoded first, so escaped markup is stripped rather than
+    revived as live tags. Markup remnants are removed, whitespace is collapsed,
+    and lines that are low-information (menus, cookie banners, symbol runs) or
+    were already seen in this or an earlier source (repeated headers and
+    footers) are dropped.
+
+    Args:
+        raw_content: raw page content from Tavily
+        seen_lines: digests of lines kept so far; updated in place
+        stats: if given, "duplicate_chars" is incremented by the repeated lines dropped
+
+    Returns:
+        str: The cleaned content
+    """
+    raw_content = _strip_blocks(html.unescape(raw_content))
+    for pattern, replacement in MARKUP_PATTERNS:
+        raw_content = pattern.sub(replacement, raw_content)
+    kept = []
+    for line in raw_content.splitlines():
+        line = " ".join(line.split())
+        if not line or _is_low_information(line):
+            continue
+        digest = hashlib.blake2b(line.lower().encode(), digest_size=8).digest()
+        if digest in seen_lines:
+            if stats is not None:
+                stats["duplicate_chars"] = stats.get("duplicate_chars", 0) + len(line)
+            continue
+        seen_lines.add(digest)
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def clean_sources(
+    sources: Iterable[dict], stats: dict, max_tokens_per_source: int = 1000
+) -> Iterator[dict]:
+    """
+    Yield sources with cleaned raw_content, one at a time.
+
+    Lines repeated across sources are kept only in the first source. `stats`
+    gets "chars_before", "chars_after", "duplicate_chars" and "tokens_saved":
+    the prompt tokens (4 characters per token) cleaning removed from what
+    format_sources would have sent under the same per-source cap. Repeated
+    lines are not counted as saved.
+    """
+    seen_lines: set[bytes] = set()
+    char_limit = max_tokens_per_source * 4
+    for key in ("chars_before", "chars_after", "duplicate_chars", "prompt_chars_saved"):
+        stats.setdefault(key, 0)
+    for source in sources:
+        raw_content = source.get("raw_content")
+        if raw_content:
+            duplicates_before = stats["duplicate_chars"]
+            cleaned = clean_raw_content(raw_content, seen_lines, stats)
+            duplicates = stats["duplicate_chars"] - duplicates_before
+            stats["chars_before"] += len(raw_content)
+            stats["chars_after"] += len(cleaned)
+            # Only the part format_sources would have kept reaches the prompt
+            would_send = min(len(raw_content) - duplicates, char_limit)
+            stats["prompt_chars_saved"] += max(
+                0, would_send - min(len(cleaned), char_limit)
+            )
+            source = {**source, "raw_content": cleaned}
+        yield source
+    stats["tokens_saved"] = stats["prompt_chars_saved"] // 4
+
+
 def format_sources(
     sources_list: list[dict],
     include_raw_content: bool = True,
@@ -77,6 +245,181 @@ def format_sources(
     return formatted_text.strip()
 
 
+def query_tokens(query: str, ignore: str = "") -> set[str]:
+    """Normalized content tokens of a search query, minus stopwords and the tokens of `ignore` (e.g. the company name)."""
+
+    def tokenize(text: str) -> set[str]:
+        tokens = set()
+        for token in re.findall(r"[a-z0-9]+", text.lower()):
+            if token in QUERY_STOPWORDS:
+                continue
+            # Crude plural folding: "founders" ~ "founder"
+            tokens.add(token[:-1] if len(token) > 3 and token.endswith("s") else token)
+        return tokens
+
+    return tokenize(query) - tokenize(ignore)
+
+
+def dedupe_queries(
+    queries: list[str], past_queries: list[str], threshold: float, ignore: str = ""
+) -> tuple[list[str], list[dict]]:
+    """
+    Drop queries that are near-duplicates of past queries or of earlier queries in the same batch.
+
+    Args:
+        queries: candidate queries, in priority order
+        past_queries: queries already run
+        threshold: token Jaccard similarity at or above which a query is a duplicate (0 disables)
+        ignore: text whose tokens don't count towards similarity, e.g. the company name
+
+    Returns:
+        tuple: (queries to run, [{"query", "duplicate_of", "similarity"}] for the skipped ones)
+    """
+    if threshold <= 0:
+        return list(queries), []
+    seen = [(q, query_tokens(q, ignore)) for q in past_queries]
+    kept, skipped = [], []
+    for query in queries:
+        tokens = query_tokens(query, ignore)
+        best, best_similarity = None, 0.0
+        for past, past_tokens in seen:
+            union = tokens | past_tokens
+            similarity = len(tokens & past_tokens) / len(union) if union else 1.0
+            if similarity > best_similarity:
+                best, best_similarity = past, similarity
+        if best is not None and best_similarity >= threshold:
+            skipped.append(
+                {
+                    "query": query,
+                    "duplicate_of": best,
+                    "similarity": round(best_similarity, 3),
+                }
+            )
+        else:
+            kept.append(query)
+            seen.append((query, tokens))
+    return kept, skipped
+
+
+def _stem(token: str) -> str:
+    """Crude suffix stripping so "founded", "founding" and "founders" all match "found"."""
+    for suffix in ("ing", "ers", "ed", "er"):
+        if len(token) > len(suffix) + 2 and token.endswith(suffix):
+            return token[: -len(suffix)]
+    return token
+
+
+def schema_field_terms(
+    extraction_schema: dict, ignore: str = ""
+) -> dict[str, set[str]]:
+    """Stemmed tokens of each schema property's name, or of its description if the name has none left."""
+    terms = {}
+    for name, prop in extraction_schema.get("properties", {}).items():
+        tokens = query_tokens(name.replace("_", " "), ignore) or query_tokens(
+            prop.get("description", ""), ignore
+        )
+        terms[name] = {_stem(token) for token in tokens}
+    return terms
+
+
+def fields_mentioned(text: str, field_terms: dict[str, set[str]]) -> set[str]:
+    """
+    Schema properties all of whose terms appear in the text (a cheap coverage estimate).
+
+    Requiring every term keeps a shared stem from covering several fields at
+    once: "founded" alone matches neither founding_year nor founder_names.
+    A field whose terms are a strict subset of another matched field's is
+    dropped, so "founder names" doesn't also count for company_name ("name").
+    """
+    tokens = {_stem(token) for token in query_tokens(text)}
+    matched = {
+        name: terms for name, terms in field_terms.items() if terms and terms <= tokens
+    }
+    return {
+        name
+        for name, terms in matched.items()
+        if not any(terms < other for other in matched.values())
+    }
+
+
+def empty_schema_fields(info: dict | None, extraction_schema: dict) -> list[str]:
+    """Schema properties that are missing, null or empty in the extracted info."""
+    info = info or {}
+    return [
+        name
+        for name in extraction_schema.get("properties", {})
+        if info.get(name) in (None, "", [], {})
+    ]
+
+
+def fill_rate(info: dict | None, extraction_schema: dict) -> float:
+    """Fraction of schema properties that are populated in the extracted info."""
+    properties = extraction_schema.get("properties", {})
+    if not properties:
+        return 1.0
+    return 1 - len(empty_schema_fields(info, extraction_schema)) / len(properties)
+
+
+def changed_fields(
+    previous: dict | None, current: dict | None, extraction_schema: dict
+) -> list[str]:
+    """Schema properties whose value differs between two extractions (empty values compare equal)."""
+    previous, current = previous or {}, current or {}
+
+    def normalized(value):
+        if value in (None, "", [], {}):
+            return None
+        return json.dumps(value, sort_keys=True, default=str)
+
+    return [
+        name
+        for name in extraction_schema.get("properties", {})
+        if normalized(previous.get(name)) != normalized(current.get(name))
+    ]
+
+
+def estimate_source_tokens(source: dict, max_tokens_per_source: int = 1000) -> int:
+    """Rough token count of a source as format_sources renders it (4 characters per token)."""
+    raw_content = source.get("raw_content") or ""
+    chars = (
+        len(source.get("title") or "")
+        + len(source["url"])
+        + len(source.get("content") or "")
+    )
+    chars += min(len(raw_content), max_tokens_per_source * 4)
+    return chars // 4
+
+
+def shard_sources(
+    sources_list: list[dict], max_shards: int, max_tokens_per_source: int = 1000
+) -> list[list[dict]]:
+    """
+    Split sources into at most max_shards shards of roughly equal token counts.
+
+    Sources are assigned largest first to the currently lightest shard, then each
+    shard is put back in the original source order.
+
+    Args:
+        sources_list: list of unique results from Tavily API
+        max_shards: maximum number of shards to return
+        max_tokens_per_source: int, per-source token limit used by format_sources
+
+    Returns:
+        list[list[dict]]: Non-empty shards of sources (one empty shard if there are no sources)
+    """
+    num_shards = max(1, min(max_shards, len(sources_list)))
+    shards: list[list[int]] = [[] for _ in range(num_shards)]
+    loads = [0] * num_shards
+    sizes = [estimate_source_tokens(s, max_tokens_per_source) for s in sources_list]
+    for idx in sorted(range(len(sources_list)), key=lambda i: -sizes[i]):
+        lightest = loads.index(min(loads))
+        shards[lightest].append(idx)
+        loads[lightest] += sizes[idx]
+    return [[sources_list[i] for i in sorted(shard)] for shard in shards if shard] or [
+        []
+    ]
+
+
 def format_all_notes(completed_notes: list[str]) -> str:
     """Format a list of notes into a string"""
     formatted_str = ""
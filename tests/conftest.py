@@ -0,0 +1,12 @@
+from test_utils.artifacts import ArtifactStore
+from test_utils.bootstrap import export_to_env
+
+
+def pytest_configure(config):
+    # Resolve candidate name/commit once; test modules and any subprocesses they spawn reuse it
+    export_to_env()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    # Blobs only referenced by overwritten manifests would otherwise pile up across runs
+    ArtifactStore().prune()
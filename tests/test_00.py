@@ -2,20 +2,23 @@
 import importlib.util
 import sys
 import os
+import time
 import json
 import hashlib
 import pathlib
 import pytest
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 import subprocess
 from test_utils.test_state import INITIAL_STATE
 from test_utils.git_branch import get_git_branch
+from test_utils.results_store import record_score
+from test_utils.artifacts import ArtifactStore
 
 
 
 DEFAULT_AGENT_FILENAME = os.getenv("DEFAULT_AGENT_FILENAME", "main.py")
 DEFAULT_AGENT_PATH = pathlib.Path.cwd() / f"../{DEFAULT_AGENT_FILENAME}"
 CANDIDATE_NAME = get_git_branch()
+ARTIFACTS = ArtifactStore()
 
 
 def _load_module(agent_py_path: pathlib.Path):
@@ -52,6 +55,7 @@ def _write_score(score):
     out_dir.mkdir(exist_ok=True, parents=True)
     with open(out_dir / f"smoke_{score['candidate']}.json", "w") as f:
         json.dump(score, f, indent=2)
+    record_score(score)
 
 def _add(score, pts, key, ok, msg=""):
     score["details"].append({"key": key, "points": (pts if ok else 0), "passed": bool(ok), "msg": msg})
@@ -62,7 +66,7 @@ def _add(score, pts, key, ok, msg=""):
 @pytest.mark.asyncio
 async def test_smoke(monkeypatch):
     # Scoring model (10 pts total)
-    score = {"candidate": CANDIDATE_NAME, "bucket": "smoke", "points": 0, "max_points": 10, "details": []}
+    score = {"candidate": CANDIDATE_NAME, "bucket": "smoke", "points": 0, "max_points": 10, "details": [], "started_at": time.time()}
 
     # A) Compile gate (2 pts)
     mod, err = _load_module(DEFAULT_AGENT_PATH)
@@ -94,8 +98,7 @@ async def test_smoke(monkeypatch):
         pytest.fail("Smoke invoke failed")
 
     ok_dict = isinstance(out, dict)
-    with open("txt_dump/output.txt", "w") as f:
-        f.write(str(out))
+    ARTIFACTS.write("output", out)
     _add(score, 1, "output_is_dict", ok_dict, "output must be a dict")
     if not ok_dict:
         _write_score(score)
@@ -108,11 +111,10 @@ async def test_smoke(monkeypatch):
         _write_score(score)
         pytest.fail("messages must be a non-empty list")
 
+    from langchain_core.messages import AIMessage, SystemMessage
+
     last_is_ai = isinstance(msgs[-1], AIMessage) or isinstance(msgs[-1], SystemMessage)
-    txt_dump_dir = pathlib.Path("txt_dump")
-    txt_dump_dir.mkdir(exist_ok=True, parents=True)
-    with open("txt_dump/last_is_ai.txt", "w") as f:
-        f.write(str(msgs))
+    ARTIFACTS.write("last_is_ai", msgs)
     _add(score, 3, "last_is_ai", last_is_ai, "last message must be AIMessage")
     if not last_is_ai:
         _write_score(score)
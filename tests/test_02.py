@@ -1,12 +1,12 @@
 # graph distance
 import os
+import time
 import json
 import pathlib
 import pytest
 import sys
 from test_utils.git_branch import get_git_branch
-
-from test_utils.graph_dist import compute_graph_distances
+from test_utils.results_store import record_score
 
 
 # Use git branch name as candidate name, with fallback to env var
@@ -20,6 +20,7 @@ def _write_score(score):
     out.mkdir(parents=True, exist_ok=True)
     with open(out / f"graph_dist_{score['candidate']}.json", "w") as f:
         json.dump(score, f, indent=2)
+    record_score(score)
 
 def _add(score, pts, key, ok, msg=""):
     score["details"].append({"key": key, "points": (pts if ok else 0), "passed": bool(ok), "msg": msg})
@@ -27,7 +28,7 @@ def _add(score, pts, key, ok, msg=""):
         score["points"] += pts
 
 def test_graph_distance():
-    score = {"candidate": CANDIDATE_NAME, "bucket": "graph_dist", "points": 0, "max_points": 5, "details": []}
+    score = {"candidate": CANDIDATE_NAME, "bucket": "graph_dist", "points": 0, "max_points": 5, "details": [], "started_at": time.time()}
     
     try:
         # Check if candidate agent exists
@@ -69,17 +70,18 @@ def test_graph_distance():
             
         from simple_text2sql import app as gold_graph
 
-        # draw gold graph
-        with open("gold_graph.png", "wb") as f:
-            f.write(gold_graph.get_graph().draw_mermaid_png())
-        
-        # Generate graph visualization
-        with open("candidate_graph.png", "wb") as f:
-            f.write(candidate_graph.get_graph().draw_mermaid_png())
+        # networkx and the render backends load only once a graph is actually compared
+        from test_utils.graph_dist import compute_graph_distances
+        from test_utils.graph_render import render_graph
+
+        # Render locally; unchanged graphs are served from the structure-hash cache
+        render_graph(gold_graph, "gold_graph.png")
+        render_graph(candidate_graph, "candidate_graph.png")
         
-        # Calculate edit distance
-        distance = compute_graph_distances(candidate_graph, gold_graph)
-        print(f"Structural edit distance: {distance}")
+        # Calculate edit distance; scored on the best edit path found, which equals the distance when exact
+        bounds = compute_graph_distances(candidate_graph, gold_graph)
+        distance = bounds.upper
+        print(f"Structural edit distance: {distance}" if bounds.exact else f"Structural edit distance: between {bounds.lower} and {bounds.upper} (search timed out)")
         
         # Calculate score based on the formula
         MAX_PTS = 5
@@ -88,7 +90,9 @@ def test_graph_distance():
         points = max(0, round(MAX_PTS * (1 - min(distance, D_CAP) / D_CAP)))
         print(f"Score: {points}/{MAX_PTS} points")
         
-        _add(score, points, "graph_distance", True, f"Edit distance: {distance}")
+        msg = f"Edit distance: {distance}" if bounds.exact else f"Edit distance: not exact, between {bounds.lower} and {bounds.upper} (scored on {bounds.upper})"
+        _add(score, points, "graph_distance", True, msg)
+        score["graph_distance_bounds"] = {"lower": bounds.lower, "upper": bounds.upper, "exact": bounds.exact}
         
     except Exception as e:
         _add(score, 0, "graph_distance", False, f"Error: {type(e).__name__}: {e}")
@@ -1,14 +1,23 @@
-import os, json, pathlib, importlib.util, sys, hashlib, pytest
-from langchain_anthropic import ChatAnthropic
-from langchain_core.messages import SystemMessage, HumanMessage
+import os, json, pathlib, importlib.util, sys, hashlib, pytest, asyncio, time
 from pydantic import BaseModel
 from typing import cast, List, Literal
-from test_utils.prompt import LLM_AS_A_JUDGE_PROMPT, USER_TASK, EXPERT_CODE
-from test_utils.format_code import folder_to_prompt_string
+from test_utils.prompt import LLM_AS_A_JUDGE_PROMPT, USER_TASK, EXPERT_CODE, DIFF_MODE_NOTE
+from test_utils.judge_cache import verdict_key, load_verdict, store_verdict
+from test_utils.judge_ensemble import run_ensemble
+from test_utils.artifacts import ArtifactStore
+from test_utils.format_code import folder_to_prompt_string, pack_files
+from test_utils.judge_diff import expert_files, structural_summary, candidate_diff
 from test_utils.git_branch import get_git_branch
+from test_utils.results_store import record_score
 
 CANDIDATE_NAME = get_git_branch()
+ARTIFACTS = ArtifactStore()
 LLM_AS_JUDGE_MODEL = "claude-sonnet-4-20250514"
+# Ensemble mode: JUDGE_SAMPLES > 1 fires that many concurrent judge samples and aggregates them
+JUDGE_SAMPLES = int(os.getenv("JUDGE_SAMPLES", "1"))
+# JUDGE_MODE=diff sends an expert structural summary plus candidate diffs instead of both full trees
+JUDGE_MODE = os.getenv("JUDGE_MODE", "full").strip().lower()
+JUDGE_TEMPERATURE = float(os.getenv("JUDGE_TEMPERATURE", "0" if JUDGE_SAMPLES == 1 else "0.7"))
 CODE_FOLDER = [pathlib.Path("../")]
 
 HUMAN_NOTES = """
@@ -42,6 +51,7 @@ def _write_score(score):
     out = pathlib.Path("results"); out.mkdir(parents=True, exist_ok=True)
     with open(out / f"code_quality_{score['candidate']}.json", "w") as f:
         json.dump(score, f, indent=2)
+    record_score(score)
 
 def _add(score, awarded_pts, key, ok, msg=""):
     score["details"].append({"key": key, "points": awarded_pts, "passed": ok, "msg": msg})
@@ -51,11 +61,26 @@ def _load_judge():
     """
     Returns a (invoke, model_name) tuple.
     """
+    from langchain_anthropic import ChatAnthropic
+
     llm = ChatAnthropic(model=LLM_AS_JUDGE_MODEL, temperature=0)
     structured_llm = llm.with_structured_output(LlmAsJudgeOutput)
 
     return (lambda msgs: structured_llm.invoke(msgs)), f"anthropic:{LLM_AS_JUDGE_MODEL}"
 
+def _load_async_judge():
+    """
+    Returns an async invoke for ensemble sampling; all samples share one rate limiter.
+    """
+    from langchain_anthropic import ChatAnthropic
+    from langchain_core.rate_limiters import InMemoryRateLimiter
+
+    rate_limiter = InMemoryRateLimiter(requests_per_second=2, check_every_n_seconds=0.05, max_bucket_size=JUDGE_SAMPLES)
+    llm = ChatAnthropic(model=LLM_AS_JUDGE_MODEL, temperature=JUDGE_TEMPERATURE, rate_limiter=rate_limiter)
+    structured_llm = llm.with_structured_output(LlmAsJudgeOutput)
+
+    return (lambda msgs: structured_llm.ainvoke(msgs)), f"anthropic:{LLM_AS_JUDGE_MODEL}"
+
 def _calculate_score(evidence_list: List[LlmAsJudgeEvidence], max_points: int) -> float:
     """Calculates a score based on a list of evidence items and their severity."""
     points_deducted = 0
@@ -73,23 +98,44 @@ def _calculate_score(evidence_list: List[LlmAsJudgeEvidence], max_points: int) -
     return max(0, max_points - points_deducted)
 
 def test_best_practices_llm_judge():
-    score = {"candidate": CANDIDATE_NAME, "bucket": "code_quality", "points": 0, "max_points": 22, "details": []}
-    user_code = folder_to_prompt_string(CODE_FOLDER)
+    score = {"candidate": CANDIDATE_NAME, "bucket": "code_quality", "points": 0, "max_points": 22, "details": [], "started_at": time.time()}
+    if JUDGE_MODE == "diff":
+        expert = expert_files()
+        expert_code = structural_summary(expert)
+        user_code = DIFF_MODE_NOTE + candidate_diff(pack_files(CODE_FOLDER), expert)
+    else:
+        expert_code = EXPERT_CODE
+        user_code = folder_to_prompt_string(CODE_FOLDER)
 
-    with open('txt_dump/user_code.txt', 'w') as f:
-        f.write(user_code)
+    ARTIFACTS.write("user_code", user_code)
 
     # Prompt the judge with task-specific guidelines
-    system = LLM_AS_A_JUDGE_PROMPT.format(user_task=USER_TASK, expert_code=EXPERT_CODE, user_code=user_code, human_notes=HUMAN_NOTES)
+    system = LLM_AS_A_JUDGE_PROMPT.format(user_task=USER_TASK, expert_code=expert_code, user_code=user_code, human_notes=HUMAN_NOTES)
     user = {
         "role": "user",
         "content": "Return the JSON object evaluating the codebase."
     }
 
+    ensemble_key = [f"samples={JUDGE_SAMPLES}", f"temperature={JUDGE_TEMPERATURE}"] if JUDGE_SAMPLES > 1 else []
+    ensemble_key += [f"mode={JUDGE_MODE}"] if JUDGE_MODE != "full" else []
+    cache_key = verdict_key(LLM_AS_JUDGE_MODEL, system, user["content"], *ensemble_key)
+    judge = load_verdict(cache_key, LlmAsJudgeOutput)
+    score["judge_cache"] = "hit" if judge is not None else "miss"
+    from langchain_core.messages import SystemMessage, HumanMessage
+
+    messages = [SystemMessage(content=system), HumanMessage(content=user["content"])]
+
     try:
-        invoke, model_name = _load_judge()
-        resp = invoke([SystemMessage(content=system), HumanMessage(content=user["content"])])
-        judge = cast(LlmAsJudgeOutput, resp)
+        if judge is None and JUDGE_SAMPLES > 1:
+            ainvoke, model_name = _load_async_judge()
+            judge, agreement = asyncio.run(run_ensemble(lambda: ainvoke(messages), JUDGE_SAMPLES))
+            score["judge_agreement"] = agreement
+            store_verdict(cache_key, judge)
+        elif judge is None:
+            invoke, model_name = _load_judge()
+            resp = invoke(messages)
+            judge = cast(LlmAsJudgeOutput, resp)
+            store_verdict(cache_key, judge)
     except Exception as e:
         _add(score, 0, "judge_error", False, f"Judge error: {type(e).__name__}: {e}")
         _write_score(score)
@@ -0,0 +1,303 @@
+# unit tests for the expert agent's resilience layer: breaker probes, retries, timeouts, hedging, error classification
+import asyncio
+import importlib.util
+import pathlib
+import sys
+import time
+
+import pytest
+
+RESILIENCE_PATH = pathlib.Path(__file__).resolve().parents[1] / "expert_src" / "resilience.py"
+
+
+def _load_resilience():
+    spec = importlib.util.spec_from_file_location("expert_resilience", RESILIENCE_PATH)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+resilience = _load_resilience()
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+class ServerError(Exception):
+    status_code = 500
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class ResponseError(Exception):
+    def __init__(self, status_code):
+        super().__init__(status_code)
+        self.response = _Response(status_code)
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+class TransportError(Exception):
+    pass
+
+
+class ConnectTimeout(TransportError):
+    pass
+
+
+def _half_open(name: str):
+    provider = resilience.get_provider(name)
+    provider.breaker.opened_at = time.monotonic() - provider.breaker.reset_timeout - 1
+    assert provider.breaker.state == "half_open"
+    return provider.breaker
+
+
+async def _ok():
+    return "ok"
+
+
+def _call(name: str, make_call, **kwargs):
+    return resilience.resilient_call(name, make_call, retries=0, hedge=False, **kwargs)
+
+
+def test_non_retryable_probe_leaves_breaker_half_open():
+    breaker = _half_open("probe-non-retryable")
+
+    async def bad_request():
+        raise BadRequestError()
+
+    async def run():
+        with pytest.raises(BadRequestError):
+            await _call("probe-non-retryable", bad_request)
+        assert breaker.state == "half_open" and not breaker.probing
+        assert await _call("probe-non-retryable", _ok) == "ok"
+        assert breaker.state == "closed"
+
+    asyncio.run(run())
+
+
+def test_cancelled_probe_releases_probe():
+    breaker = _half_open("probe-cancelled")
+
+    async def hang():
+        await asyncio.sleep(60)
+
+    async def run():
+        task = asyncio.create_task(_call("probe-cancelled", hang))
+        await asyncio.sleep(0.05)
+        assert breaker.probing
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert breaker.state == "half_open" and not breaker.probing
+        assert await _call("probe-cancelled", _ok) == "ok"
+        assert breaker.state == "closed"
+
+    asyncio.run(run())
+
+
+def test_timed_out_probe_reopens_breaker():
+    breaker = _half_open("probe-timeout")
+
+    async def hang():
+        await asyncio.sleep(60)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await _call("probe-timeout", hang, timeout=0.05)
+        assert breaker.state == "open" and not breaker.probing
+        with pytest.raises(resilience.CircuitOpenError):
+            await _call("probe-timeout", _ok)
+
+    asyncio.run(run())
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = _half_open("probe-failed")
+
+    async def server_error():
+        raise ServerError()
+
+    async def run():
+        with pytest.raises(ServerError):
+            await _call("probe-failed", server_error)
+        assert breaker.state == "open" and not breaker.probing
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("error", [BadRequestError(), RuntimeError("Event loop is closed")])
+def test_non_retryable_error_leaves_failures_untouched(error):
+    provider = resilience.get_provider(f"non-retryable-{type(error).__name__}")
+    provider.breaker.failures = 3
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        raise error
+
+    with pytest.raises(type(error)):
+        asyncio.run(resilience.resilient_call(provider.name, fail, retries=2, backoff_base=0))
+    assert len(calls) == 1 and provider.stats["retries"] == 0
+    assert provider.breaker.failures == 3 and provider.breaker.state == "closed"
+
+
+def test_retries_with_capped_full_jitter(monkeypatch):
+    provider = resilience.get_provider("retry-then-ok")
+    bounds = []
+    monkeypatch.setattr(resilience.random, "uniform", lambda lo, hi: bounds.append((lo, hi)) or 0.0)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 4:
+            raise ServerError()
+        return "ok"
+
+    result = asyncio.run(resilience.resilient_call(provider.name, flaky, retries=3, backoff_base=1.0, backoff_cap=3.0))
+    assert result == "ok"
+    assert bounds == [(0, 1.0), (0, 2.0), (0, 3.0)]
+    assert provider.stats["calls"] == 4 and provider.stats["retries"] == 3 and provider.stats["failures"] == 3
+    assert provider.breaker.failures == 0
+
+
+def test_gives_up_after_retries():
+    provider = resilience.get_provider("retry-exhausted")
+    attempts = []
+
+    async def down():
+        attempts.append(1)
+        raise ResponseError(503)
+
+    with pytest.raises(ResponseError):
+        asyncio.run(resilience.resilient_call(provider.name, down, retries=2, backoff_base=0))
+    assert len(attempts) == 3 and provider.stats["retries"] == 2
+    assert provider.breaker.failures == 3
+
+
+def test_timeout_is_counted_and_retried():
+    provider = resilience.get_provider("timeout-then-ok")
+    attempts = []
+
+    async def slow_once():
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(60)
+        return "ok"
+
+    result = asyncio.run(resilience.resilient_call(provider.name, slow_once, timeout=0.05, retries=1, backoff_base=0))
+    assert result == "ok"
+    assert provider.stats["timeouts"] == 1 and provider.stats["retries"] == 1
+
+
+def _warm(provider, kind: str, seconds: float = 0.01):
+    for _ in range(resilience.MIN_HEDGE_SAMPLES):
+        provider.record_latency(kind, seconds)
+
+
+def _slow_then_fast(cancelled: list):
+    calls = []
+
+    async def make_call():
+        calls.append(1)
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+            return "primary"
+        return "hedge"
+
+    return make_call, calls
+
+
+def test_hedge_wins_and_cancels_the_primary():
+    provider = resilience.get_provider("hedge-wins")
+    _warm(provider, "short")
+    cancelled = []
+    make_call, calls = _slow_then_fast(cancelled)
+
+    async def run():
+        result = await resilience.resilient_call(provider.name, make_call, hedge=True, kind="short")
+        await asyncio.sleep(0)  # let the cancelled primary unwind
+        return result
+
+    assert asyncio.run(run()) == "hedge"
+    assert len(calls) == 2 and cancelled == [1]
+    assert provider.stats["hedges"] == 1 and provider.stats["hedge_wins"] == 1
+    assert provider.stats["calls"] == 1  # the hedge belongs to the same attempt
+
+
+def test_hedge_thresholds_are_per_kind():
+    provider = resilience.get_provider("hedge-per-kind")
+    _warm(provider, "short")
+    calls = []
+
+    async def long_call():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    assert asyncio.run(resilience.resilient_call(provider.name, long_call, hedge=True, kind="long")) == "ok"
+    assert len(calls) == 1 and provider.stats["hedges"] == 0
+    assert provider.p95("short") == 0.01 and provider.p95("long") is None
+
+
+def test_hedging_is_off_by_default():
+    provider = resilience.get_provider("hedge-default")
+    _warm(provider, "default")
+    make_call, calls = _slow_then_fast([])
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await resilience.resilient_call(provider.name, make_call, timeout=0.1, retries=0)
+
+    asyncio.run(run())
+    assert len(calls) == 1 and provider.stats["hedges"] == 0
+
+
+def test_hedge_skipped_when_pool_is_full():
+    provider = resilience.get_provider("hedge-pool-full")
+    _warm(provider, "short")
+    resilience.set_concurrency_limit(provider.name, 1)
+    make_call, calls = _slow_then_fast([])
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await resilience.resilient_call(provider.name, make_call, timeout=0.1, retries=0, hedge=True, kind="short")
+        return provider.peak_in_use
+
+    try:
+        peak = asyncio.run(run())
+    finally:
+        resilience.set_concurrency_limit(provider.name, None)
+    assert len(calls) == 1 and provider.stats["hedges"] == 0
+    assert peak == 1 and provider.in_use == 0
+
+
+@pytest.mark.parametrize("error, retryable", [
+    (asyncio.TimeoutError(), True),
+    (ConnectionResetError(), True),
+    (ResponseError(408), True),
+    (ResponseError(409), True),
+    (ResponseError(429), True),
+    (ResponseError(502), True),
+    (ServerError(), True),
+    (APIConnectionError(), True),
+    (ConnectTimeout(), True),  # matched through its base class name
+    (BadRequestError(), False),
+    (ResponseError(404), False),
+    (ValueError("bad schema"), False),
+    (RuntimeError("Event loop is closed"), False),
+    (resilience.CircuitOpenError(), False),
+])
+def test_is_retryable(error, retryable):
+    assert resilience.is_retryable(error) is retryable
@@ -0,0 +1,105 @@
+# unit tests for the expert agent's search policy (search_in_waves, speculative search), against a fake Tavily client
+import asyncio
+
+from test_utils.expert_agent import import_agent
+
+graph = import_agent("graph")
+Configuration = import_agent("configuration").Configuration
+OverallState = import_agent("state").OverallState
+
+SCHEMA = {
+    "title": "Company",
+    "type": "object",
+    "properties": {
+        "ceo_name": {"type": "string"},
+        "founding_year": {"type": "integer"},
+        "headquarters": {"type": "string"},
+        "employee_count": {"type": "integer"},
+    },
+}
+
+
+class FakeTavily:
+    """Answers each query from `pages`; records the max_results every search asked for."""
+
+    def __init__(self, pages: dict[str, list[dict]]):
+        self.pages, self.calls = pages, []
+
+    async def search(self, query, max_results, **kwargs):
+        self.calls.append((query, max_results))
+        return {"results": self.pages.get(query, [])[:max_results]}
+
+
+def _run(pages, queries, monkeypatch, seen_urls=(), **config):
+    client = FakeTavily(pages)
+    monkeypatch.setattr(graph, "get_tavily_client", lambda api_url=None: client)
+    configurable = Configuration(**{"adaptive_search": True, "max_search_results": 4, "search_wave_size": 1, **config})
+    state = OverallState(company="Acme", extraction_schema=SCHEMA)
+    responses, decisions = asyncio.run(graph.search_in_waves(queries, state, configurable, set(seen_urls)))
+    return client, responses, decisions
+
+
+def _page(url, content="Acme press release"):
+    return {"url": url, "title": "Acme", "content": content}
+
+
+def test_productive_query_keeps_budget_despite_useless_neighbour(monkeypatch):
+    pages = {
+        "useless": [_page("https://old.example")],
+        "useful": [_page("https://new.example/1"), _page("https://new.example/2")],
+        "later": [_page("https://new.example/3")],
+    }
+    client, _, decisions = _run(pages, ["useless", "useful", "later"], monkeypatch,
+                                seen_urls={"https://old.example"}, search_wave_size=2)
+    assert [d["action"] for d in decisions] == ["continue", "continue"]
+    assert decisions[0]["per_query"] == {
+        "useless": {"new_urls": 0, "relevant_results": 0},
+        "useful": {"new_urls": 2, "relevant_results": 0},
+    }
+    assert client.calls[-1] == ("later", 4)
+
+
+def test_unproductive_wave_halves_later_budgets(monkeypatch):
+    pages = {q: [_page("https://old.example")] for q in ("q1", "q2", "q3")}
+    client, _, decisions = _run(pages, ["q1", "q2", "q3"], monkeypatch, seen_urls={"https://old.example"})
+    assert [d["action"] for d in decisions] == ["shrink", "shrink", "shrink"]
+    assert [max_results for _, max_results in client.calls] == [4, 2, 1]
+
+
+def test_coverage_threshold_skips_remaining_waves(monkeypatch):
+    covering = "Acme CEO name, founding year, headquarters and employee count"
+    pages = {"all fields": [_page("https://new.example", covering)], "never run": [_page("https://other.example")]}
+    client, responses, decisions = _run(pages, ["all fields", "never run"], monkeypatch, coverage_threshold=1.0)
+    assert [query for query, _ in client.calls] == ["all fields"]
+    assert responses[1] is None
+    assert decisions[-1]["action"] == "skip" and decisions[-1]["queries"] == ["never run"]
+
+
+class FakeReflectionModel:
+    """Chat model stand-in whose structured output is always `output`."""
+
+    def __init__(self, output):
+        self.output = output
+
+    def with_structured_output(self, schema):
+        return self
+
+    async def ainvoke(self, messages):
+        return self.output
+
+
+def test_reformulated_query_reuses_speculative_search(monkeypatch):
+    pages = {"Acme ceo name": [_page("https://new.example/ceo")]}
+    client = FakeTavily(pages)
+    monkeypatch.setattr(graph, "get_tavily_client", lambda api_url=None: client)
+    output = graph.ReflectionOutput(is_satisfactory=False, missing_fields=["CEO"], reasoning="no CEO yet",
+                                    search_queries=["name of the Acme CEO", "Acme funding rounds"])
+    monkeypatch.setattr(graph, "get_chat_model", lambda api_url=None: FakeReflectionModel(output))
+    config = {"configurable": {"speculative_search": True, "max_search_queries": 1, "max_reflection_steps": 1}}
+    state = OverallState(company="Acme", extraction_schema=SCHEMA, info={})
+    update = asyncio.run(graph.reflection(state, config))
+    assert [query for query, _ in client.calls] == ["Acme ceo name"]
+    assert update["search_queries"] == ["Acme funding rounds"]
+    assert update["speculative_search_docs"][0]["query"] == "Acme ceo name"
+    assert update["query_history"] == [{"query": "name of the Acme CEO", "duplicate_of": "Acme ceo name",
+                                        "similarity": 1.0, "status": "skipped", "urls": []}]
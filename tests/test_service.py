@@ -0,0 +1,149 @@
+# unit tests for the expert agent's enrichment service: fair dispatch, fair rate-limit sharing, HTTP limits
+import asyncio
+import json
+
+from test_utils.expert_agent import import_agent
+
+service = import_agent("service")
+
+WEIGHTS = {"interactive": 3, "batch": 1}
+
+
+def _job(priority: str):
+    return service.Job(company="Acme", priority=priority)
+
+
+def test_fair_queue_serves_classes_by_weight():
+    async def run():
+        queue = service.FairQueue(WEIGHTS, max_size=100)
+        for _ in range(10):
+            queue.put_nowait(_job("batch"))
+        for _ in range(10):
+            queue.put_nowait(_job("interactive"))
+        return [(await queue.get()).priority for _ in range(8)]
+
+    served = asyncio.run(run())
+    assert served.count("interactive") == 6 and served.count("batch") == 2
+
+
+def test_fair_queue_idle_class_banks_no_credit():
+    async def run():
+        queue = service.FairQueue(WEIGHTS, max_size=100)
+        for _ in range(20):
+            queue.put_nowait(_job("batch"))
+        for _ in range(12):
+            await queue.get()
+        # interactive was idle while batch ran 12 jobs; it rejoins at batch's pass
+        for _ in range(20):
+            queue.put_nowait(_job("interactive"))
+        return [(await queue.get()).priority for _ in range(8)]
+
+    served = asyncio.run(run())
+    assert served.count("batch") == 2
+
+
+def test_fair_limiter_shares_tokens_by_weight():
+    async def run():
+        tokens = 0
+
+        async def one_token():
+            nonlocal tokens
+            await asyncio.sleep(0)
+            tokens += 1
+
+        limiter = service.FairLimiter(one_token, WEIGHTS)
+        order = []
+
+        async def call(priority):
+            await limiter.acquire(priority)
+            order.append(priority)
+
+        # batch queues many calls first, as a few expensive jobs would
+        calls = [call("batch") for _ in range(12)] + [call("interactive") for _ in range(12)]
+        await asyncio.gather(*calls)
+        return order, tokens, limiter.granted
+
+    order, tokens, granted = asyncio.run(run())
+    assert tokens == 24 and granted == {"interactive": 12, "batch": 12}
+    assert order[:8].count("interactive") == 6
+
+
+def test_fair_limiter_skips_cancelled_waiters():
+    async def run():
+        gate = asyncio.Event()
+
+        async def gated_token():
+            await gate.wait()
+
+        limiter = service.FairLimiter(gated_token, WEIGHTS)
+        cancelled = asyncio.create_task(limiter.acquire("interactive"))
+        waiting = asyncio.create_task(limiter.acquire("batch"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        gate.set()
+        await asyncio.wait_for(waiting, 1)
+        return limiter.granted
+
+    assert asyncio.run(run()) == {"interactive": 0, "batch": 1}
+
+
+async def _request(svc, raw: bytes) -> tuple[int, dict]:
+    server = await asyncio.start_server(svc.handle, "127.0.0.1", 0, limit=service.MAX_LINE_BYTES)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def _post(payload: dict | None = None, body: bytes | None = None, headers: str = "") -> bytes:
+    body = json.dumps(payload).encode() if body is None else body
+    return f"POST /jobs HTTP/1.1\r\nContent-Length: {len(body)}\r\n{headers}\r\n".encode() + body
+
+
+def _call(raw: bytes) -> tuple[int, dict]:
+    async def run():
+        svc = service.EnrichmentService(weights=WEIGHTS)  # workers not started: jobs stay queued
+        return await _request(svc, raw)
+
+    return asyncio.run(run())
+
+
+def test_submit_accepts_allowed_config():
+    status, body = _call(_post({"company": "Acme", "config": {"max_search_queries": 2}}))
+    assert status == 202 and body["status"] == "queued"
+
+
+def test_submit_rejects_disallowed_config_keys():
+    status, body = _call(_post({"company": "Acme", "config": {"anthropic_api_url": "http://attacker", "reduce_model": "x"}}))
+    assert status == 400 and "anthropic_api_url" in body["error"] and "reduce_model" in body["error"]
+
+
+def test_body_over_cap_is_rejected_unread():
+    raw = f"POST /jobs HTTP/1.1\r\nContent-Length: {service.MAX_BODY_BYTES + 1}\r\n\r\n".encode()
+    assert _call(raw)[0] == 413
+
+
+def test_invalid_content_length():
+    for value in ("abc", "-5"):
+        raw = f"POST /jobs HTTP/1.1\r\nContent-Length: {value}\r\n\r\n".encode()
+        assert _call(raw)[0] == 400
+
+
+def test_oversized_header_line_gets_431():
+    status, body = _call(_post({"company": "Acme"}, headers=f"X-Big: {'a' * (2 * service.MAX_LINE_BYTES)}\r\n"))
+    assert status == 431
+
+
+def test_too_many_headers_gets_431():
+    headers = "".join(f"X-H{i}: 1\r\n" for i in range(service.MAX_HEADERS + 1))
+    assert _call(_post({"company": "Acme"}, headers=headers))[0] == 431
+
+
+def test_oversized_request_line_gets_400():
+    raw = f"GET /jobs/{'a' * (2 * service.MAX_LINE_BYTES)} HTTP/1.1\r\n\r\n".encode()
+    assert _call(raw)[0] == 400
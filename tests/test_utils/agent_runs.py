@@ -0,0 +1,74 @@
+"""
+Session-wide memo of candidate agent runs.
+
+Several harness checks only need the output of invoking the candidate on the
+same input state. Each distinct state is invoked once per session, distinct
+states run concurrently, and every check reads the cached output together with
+the HTTP traffic recorded for that run.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Any
+
+import pytest
+
+from test_utils.traffic import TrafficRecorder, current_recorder, install_recorder
+
+
+@dataclass
+class AgentRun:
+    """Result of invoking the candidate app on one input state."""
+
+    state: dict
+    output: Any = None
+    error: Exception | None = None
+    traffic: TrafficRecorder = field(default_factory=TrafficRecorder)
+
+    def result(self) -> Any:
+        """Return the cached output, re-raising the invoke error if the run failed."""
+        if self.error is not None:
+            raise self.error
+        return self.output
+
+
+def state_key(state: dict) -> str:
+    """Canonical key for an input state; equal states share one run."""
+    return json.dumps(state, sort_keys=True, default=str)
+
+
+class AgentRunCache:
+    """Invokes each distinct (app, state) pair once and memoizes the result."""
+
+    def __init__(self, recorder: TrafficRecorder | None = None):
+        # Session-wide recorder; each run additionally gets its own
+        self.recorder = recorder or TrafficRecorder()
+        self._runs: dict[tuple[int, str], AgentRun] = {}
+
+    async def _invoke(self, app, state: dict) -> AgentRun:
+        run = AgentRun(state=state)
+        # Each run executes in its own task, so this only scopes traffic to this run
+        current_recorder.set(run.traffic)
+        try:
+            run.output = await app.ainvoke(state)
+        except Exception as e:
+            run.error = e
+        return run
+
+    async def run(self, app, states: list[dict]) -> list[AgentRun]:
+        """Return one AgentRun per state, invoking only states not seen before."""
+        pending = {}
+        for state in states:
+            key = (id(app), state_key(state))
+            if key not in self._runs:
+                pending.setdefault(key, state)
+
+        if pending:
+            with pytest.MonkeyPatch.context() as mp:
+                install_recorder(mp, self.recorder)
+                tasks = [asyncio.create_task(self._invoke(app, state)) for state in pending.values()]
+                runs = await asyncio.gather(*tasks)
+            self._runs.update(zip(pending, runs))
+
+        return [self._runs[(id(app), state_key(state))] for state in states]
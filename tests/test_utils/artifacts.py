@@ -0,0 +1,136 @@
+"""
+Compact, deduplicated run artifacts.
+
+Each harness check writes a small JSON manifest (`txt_dump/<check>.json`). Large
+values inside the run output (search results, notes, whole outputs) are stored
+once as content-addressed blobs under `txt_dump/blobs/` and referenced from the
+manifest as {"$blob": <sha256>}, so the same output written by several checks,
+or the same search result repeated across outputs, costs one file. `read()`
+rebuilds any check's full view, and `prune()` (run at the end of every pytest
+session) deletes blobs that no manifest references any more.
+
+Prune by hand with `python -m test_utils.artifacts --prune` (from the harness cwd).
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import pathlib
+import sys
+import time
+from typing import Any
+
+ARTIFACT_DIR = pathlib.Path("txt_dump")
+BLOB_MIN_BYTES = 512  # smaller values stay inline in their parent
+PRUNE_GRACE_S = 300  # unreferenced blobs younger than this may belong to a manifest still being written
+
+
+def to_jsonable(value: Any) -> Any:
+    """Structured JSON view of run outputs: messages, pydantic models, dataclasses, sets."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [to_jsonable(v) for v in value]
+    if hasattr(value, "model_dump"):
+        return to_jsonable(value.model_dump())
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return to_jsonable(dataclasses.asdict(value))
+    return str(value)
+
+
+class ArtifactStore:
+    def __init__(self, root: str | pathlib.Path = ARTIFACT_DIR):
+        self.root = pathlib.Path(root)
+        self.blob_dir = self.root / "blobs"
+        self._known: set[str] = set()
+
+    def _put_blob(self, encoded: str) -> str:
+        digest = hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+        if digest not in self._known:
+            path = self.blob_dir / f"{digest}.json"
+            if not path.exists():
+                self.blob_dir.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(f".tmp{os.getpid()}")
+                tmp.write_text(encoded, encoding="utf-8")
+                os.replace(tmp, path)
+            self._known.add(digest)
+        return digest
+
+    def _encode(self, value: Any) -> Any:
+        """Bottom-up: children are encoded (and blobbed) first, so each node is serialized once."""
+        if isinstance(value, dict):
+            node = {k: self._encode(v) for k, v in value.items()}
+        elif isinstance(value, list):
+            node = [self._encode(v) for v in value]
+        elif isinstance(value, str) and len(value) >= BLOB_MIN_BYTES:
+            node = value
+        else:
+            return value
+        encoded = json.dumps(node, sort_keys=True, separators=(",", ":"))
+        if len(encoded) < BLOB_MIN_BYTES:
+            return node
+        return {"$blob": self._put_blob(encoded)}
+
+    def write(self, check: str, value: Any) -> pathlib.Path:
+        """Store a check's view of the run output as a manifest plus shared blobs."""
+        manifest = {"check": check, "written_at": time.time(), "root": self._encode(to_jsonable(value))}
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / f"{check}.json"
+        path.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+        return path
+
+    def _decode(self, node: Any) -> Any:
+        if isinstance(node, dict):
+            if set(node) == {"$blob"}:
+                return self._decode(json.loads((self.blob_dir / f"{node['$blob']}.json").read_text(encoding="utf-8")))
+            return {k: self._decode(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [self._decode(v) for v in node]
+        return node
+
+    def read(self, check: str) -> Any:
+        """Rebuild the full value a check wrote."""
+        manifest = json.loads((self.root / f"{check}.json").read_text(encoding="utf-8"))
+        return self._decode(manifest["root"])
+
+    def _referenced(self, node: Any, seen: set[str]) -> None:
+        if isinstance(node, dict):
+            if set(node) == {"$blob"}:
+                digest = node["$blob"]
+                if digest not in seen:
+                    seen.add(digest)
+                    path = self.blob_dir / f"{digest}.json"
+                    if path.exists():
+                        self._referenced(json.loads(path.read_text(encoding="utf-8")), seen)
+                return
+            for v in node.values():
+                self._referenced(v, seen)
+        elif isinstance(node, list):
+            for v in node:
+                self._referenced(v, seen)
+
+    def prune(self, grace_s: float = PRUNE_GRACE_S) -> int:
+        """Delete blobs no manifest references (directly or through another blob); returns how many."""
+        if not self.blob_dir.is_dir():
+            return 0
+        seen: set[str] = set()
+        for path in self.root.glob("*.json"):
+            try:
+                self._referenced(json.loads(path.read_text(encoding="utf-8")).get("root"), seen)
+            except (OSError, ValueError, AttributeError):
+                continue
+        cutoff, removed = time.time() - grace_s, 0
+        for path in self.blob_dir.glob("*.json"):
+            if path.stem not in seen and path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                self._known.discard(path.stem)
+                removed += 1
+        return removed
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--prune"]:
+        print(f"Pruned {ArtifactStore().prune(grace_s=0)} unreferenced blobs")
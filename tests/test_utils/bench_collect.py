@@ -0,0 +1,87 @@
+"""
+Collection-time benchmark.
+
+Runs `pytest --collect-only` on the harness tests in fresh interpreters and
+reports the median wall time next to an empty-test baseline (interpreter plus
+pytest plugin startup), so import-time regressions in test modules show up as
+the gap between the two. Exits non-zero when that gap (the harness's own
+overhead) exceeds the budget; the baseline depends on the machine and the
+installed pytest plugins, so it isn't budgeted.
+
+Usage (from the harness root):
+    python tests/test_utils/bench_collect.py --repeat 5 --budget 0.5
+"""
+
+import argparse
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HARNESS_ROOT = pathlib.Path(__file__).resolve().parents[2]
+TESTS_DIR = HARNESS_ROOT / "tests"
+DEFAULT_TESTS = sorted(str(p) for p in TESTS_DIR.glob("test_0*.py"))
+
+
+def time_collect(paths: list[str], repeat: int, extra_args: list[str], cwd: pathlib.Path) -> list[float]:
+    cmd = [sys.executable, "-m", "pytest", "--collect-only", "-q", "-p", "no:cacheprovider", *extra_args, *paths]
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
+        timings.append(time.perf_counter() - started)
+        if proc.returncode not in (0, 5):  # 5: no tests collected
+            raise RuntimeError(f"collection failed ({proc.returncode}):\n{proc.stdout}\n{proc.stderr}")
+    return timings
+
+
+def slowest_imports(paths: list[str], cwd: pathlib.Path, top: int = 10) -> list[tuple[float, str]]:
+    """Top cumulative import times (s) during collection, from `python -X importtime`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "pytest", "--collect-only", "-q", "-p", "no:cacheprovider", *paths],
+        cwd=cwd, capture_output=True, text=True,
+    )
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.removeprefix("import time:").split("|"))
+        if not name.startswith(" ") and "." not in name:  # top-level packages only
+            entries.append((int(cumulative) / 1e6, name))
+    return sorted(entries, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pytest collection time of the harness tests.")
+    parser.add_argument("--tests", nargs="+", default=DEFAULT_TESTS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=0.5, help="Max harness overhead over the baseline (s)")
+    parser.add_argument("--pytest-args", nargs=argparse.REMAINDER, default=[], help="Extra pytest args, e.g. -p no:langsmith")
+    parser.add_argument("--imports", action="store_true", help="Also list the slowest top-level imports")
+    args = parser.parse_args()
+
+    # Interleave baseline and harness runs so machine-load drift hits both alike
+    baseline_timings, timings = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        empty = pathlib.Path(tmp) / "test_empty.py"
+        empty.write_text("def test_empty():\n    pass\n")
+        for _ in range(args.repeat):
+            baseline_timings += time_collect([str(empty)], 1, args.pytest_args, pathlib.Path(tmp))
+            timings += time_collect(args.tests, 1, args.pytest_args, TESTS_DIR)
+    baseline, median = statistics.median(baseline_timings), statistics.median(timings)
+    # The fastest runs carry the least scheduling noise, so the budget uses them
+    overhead = min(timings) - min(baseline_timings)
+    print(f"baseline (empty test): {baseline:.3f}s median (min {min(baseline_timings):.3f}s)")
+    print(f"harness collection:    {median:.3f}s median of {len(timings)} (min {min(timings):.3f}s, max {max(timings):.3f}s)")
+    print(f"harness overhead:      {overhead:.3f}s (min vs min)")
+    if args.imports:
+        for seconds, name in slowest_imports(args.tests, TESTS_DIR):
+            print(f"  {seconds:7.3f}s  {name}")
+    if overhead > args.budget:
+        print(f"FAIL: harness overhead {overhead:.3f}s exceeds budget {args.budget:.3f}s (see --imports)")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
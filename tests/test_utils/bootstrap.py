@@ -0,0 +1,95 @@
+"""
+Harness bootstrap: candidate metadata resolved once per session.
+
+The candidate name/commit come from CANDIDATE_NAME / CANDIDATE_COMMIT when set
+(the multi-candidate runner sets them; CANDIDATE_COMMIT=unknown means the
+candidate has no commit, e.g. a plain directory, and is recorded as None);
+otherwise they are read straight from `.git/HEAD` instead of spawning `git`
+subprocesses. conftest.py exports the
+result to the environment so worker subprocesses inherit it.
+"""
+
+import functools
+import os
+import pathlib
+from dataclasses import dataclass
+
+HARNESS_ROOT = pathlib.Path(__file__).resolve().parents[2]
+UNKNOWN_COMMIT = "unknown"  # set by score_candidates when the candidate has no commit
+
+
+@dataclass(frozen=True)
+class CandidateMetadata:
+    name: str
+    commit: str | None
+
+
+def _find_git_dir(start: pathlib.Path) -> tuple[pathlib.Path, pathlib.Path] | None:
+    """
+    Walk up from start to the nearest repo: (directory holding `.git`, its git dir).
+
+    `.git` files of worktrees/submodules are followed to the real git dir, which
+    may live far away (e.g. `main/.git/worktrees/x`), so callers walk on from the
+    returned top-level directory, never from the git dir.
+    """
+    for directory in [start, *start.parents]:
+        dot_git = directory / ".git"
+        if dot_git.is_dir():
+            return directory, dot_git
+        if dot_git.is_file():
+            content = dot_git.read_text().strip()
+            if content.startswith("gitdir:"):
+                return directory, (directory / content.split(":", 1)[1].strip()).resolve()
+    return None
+
+
+def _resolve_ref(git_dir: pathlib.Path, ref: str) -> str | None:
+    common = git_dir / "commondir"
+    common_dir = (git_dir / common.read_text().strip()).resolve() if common.is_file() else git_dir
+    for base in (git_dir, common_dir):
+        ref_file = base / ref
+        if ref_file.is_file():
+            return ref_file.read_text().strip()
+    packed = common_dir / "packed-refs"
+    if packed.is_file():
+        for line in packed.read_text().splitlines():
+            if line.endswith(f" {ref}"):
+                return line.split(" ", 1)[0]
+    return None
+
+
+def read_head(git_dir: pathlib.Path) -> tuple[str, str | None]:
+    """(branch, commit) from HEAD; a detached HEAD reports branch "HEAD" like `git rev-parse --abbrev-ref`."""
+    head = (git_dir / "HEAD").read_text().strip()
+    if head.startswith("ref:"):
+        ref = head.split(":", 1)[1].strip()
+        return ref.removeprefix("refs/heads/"), _resolve_ref(git_dir, ref)
+    return "HEAD", head
+
+
+@functools.cache
+def candidate_metadata() -> CandidateMetadata:
+    name = os.getenv("CANDIDATE_NAME", "").strip()
+    commit = os.getenv("CANDIDATE_COMMIT", "").strip() or None
+    if name and commit:
+        # Never fall back to the harness repo's HEAD for a candidate known to have no commit
+        return CandidateMetadata(name, None if commit == UNKNOWN_COMMIT else commit)
+
+    # Prefer the repo enclosing the harness (the candidate's), falling back to the harness repo itself
+    harness_repo = _find_git_dir(HARNESS_ROOT)
+    outer_repo = _find_git_dir(harness_repo[0].parent) if harness_repo else None
+    git_dir = (outer_repo or harness_repo or (None, None))[1]
+    if git_dir is None:
+        if name:
+            return CandidateMetadata(name, commit)
+        raise Exception("Failed to get git branch name")
+    branch, head_commit = read_head(git_dir)
+    return CandidateMetadata(name or branch, commit or head_commit)
+
+
+def export_to_env() -> None:
+    """Make the resolved metadata visible to subprocesses (and skip re-resolution there)."""
+    metadata = candidate_metadata()
+    os.environ.setdefault("CANDIDATE_NAME", metadata.name)
+    if metadata.commit:
+        os.environ.setdefault("CANDIDATE_COMMIT", metadata.commit)
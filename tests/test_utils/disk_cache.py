@@ -0,0 +1,61 @@
+"""
+Content-addressed on-disk cache shared by harness utilities.
+
+Entries live under `HARNESS_CACHE_DIR` (default `.cache/` in the harness root, so
+parallel workers and reruns share it), grouped by namespace and keyed by a SHA-256
+of everything that determines their content.
+"""
+
+import hashlib
+import os
+import pathlib
+import shutil
+import tempfile
+
+CACHE_DIR = pathlib.Path(os.getenv("HARNESS_CACHE_DIR", pathlib.Path(__file__).resolve().parents[2] / ".cache"))
+
+
+def content_key(*parts: str | bytes) -> str:
+    """Hash the given parts (order-sensitive, unambiguous separators) into a cache key."""
+    h = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def cache_path(namespace: str, key: str, suffix: str = "") -> pathlib.Path:
+    return CACHE_DIR / namespace / f"{key}{suffix}"
+
+
+def read_bytes(namespace: str, key: str, suffix: str = "") -> bytes | None:
+    try:
+        return cache_path(namespace, key, suffix).read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def write_bytes(namespace: str, key: str, data: bytes, suffix: str = "") -> pathlib.Path:
+    """Write atomically so concurrent harness workers never observe a partial entry."""
+    path = cache_path(namespace, key, suffix)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return path
+
+
+def read_text(namespace: str, key: str, suffix: str = "") -> str | None:
+    data = read_bytes(namespace, key, suffix)
+    return None if data is None else data.decode("utf-8")
+
+
+def write_text(namespace: str, key: str, text: str, suffix: str = "") -> pathlib.Path:
+    return write_bytes(namespace, key, text.encode("utf-8"), suffix)
+
+
+def clear(namespace: str) -> None:
+    """Drop every entry in a namespace."""
+    shutil.rmtree(CACHE_DIR / namespace, ignore_errors=True)
@@ -0,0 +1,27 @@
+"""
+Import the expert implementation (expert_src/) as the `agent` package it is written as.
+
+expert_src has no __init__.py and is deployed under the name `agent`, so unit
+tests register a package of that name rooted at expert_src before importing
+`agent.graph`, `agent.service` and so on. Placeholder API keys are set because
+the module-level clients refuse to build without one; nothing is sent.
+"""
+
+import importlib
+import os
+import pathlib
+import sys
+import types
+
+EXPERT_SRC = pathlib.Path(__file__).resolve().parents[2] / "expert_src"
+
+
+def import_agent(module: str):
+    """Import `agent.<module>` from expert_src."""
+    os.environ.setdefault("ANTHROPIC_API_KEY", "unit-test")
+    os.environ.setdefault("TAVILY_API_KEY", "unit-test")
+    if "agent" not in sys.modules:
+        package = types.ModuleType("agent")
+        package.__path__ = [str(EXPERT_SRC)]
+        sys.modules["agent"] = package
+    return importlib.import_module(f"agent.{module}")
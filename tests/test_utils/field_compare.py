@@ -0,0 +1,148 @@
+"""
+Deterministic, schema-driven field comparators.
+
+Decides whether a test response covers an expected response field by field,
+without an LLM, wherever a program can: normalized strings, numeric tolerance
+and set overlap. Fields the checks cannot decide (typically free text that is
+rephrased) come back undecided, for one batched LLM call.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Any
+
+CORPORATE_SUFFIXES = {"inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation", "co", "pbc", "plc", "gmbh", "sa", "ag"}
+NUMBER_TOLERANCE = {"integer": 0.0, "number": 0.01}  # absolute for integers, relative for numbers
+MAX_NAME_TOKENS = 6  # strings this short are names/labels, compared deterministically
+TRUE_STRINGS = {"true", "yes", "y", "1"}
+FALSE_STRINGS = {"false", "no", "n", "0"}
+
+
+@dataclass
+class FieldVerdict:
+    field: str
+    match: bool | None  # None: undecided, needs the LLM
+    reason: str
+    tier: str = "deterministic"
+
+
+def normalize_text(value: Any) -> str:
+    text = unicodedata.normalize("NFKD", str(value)).encode("ascii", "ignore").decode().casefold()
+    tokens = re.findall(r"[a-z0-9]+", text)
+    while tokens and tokens[-1] in CORPORATE_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, (str, list, dict, tuple, set)) and len(value) == 0)
+
+
+def _infer_type(value: Any) -> str:
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, (list, tuple, set)):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return "string"
+
+
+def _to_number(value: Any) -> float | None:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"-?\d+(?:\.\d+)?", str(value).replace(",", ""))
+    return float(match.group()) if match else None
+
+
+def _compare_number(test, expected, kind: str) -> tuple[bool | None, str]:
+    t, e = _to_number(test), _to_number(expected)
+    if t is None or e is None:
+        return None, "not numeric"
+    tolerance = NUMBER_TOLERANCE[kind] * (abs(e) if kind == "number" else 1)
+    ok = abs(t - e) <= tolerance
+    return ok, f"{t:g} vs expected {e:g}"
+
+
+def _compare_string(test, expected) -> tuple[bool | None, str]:
+    t, e = normalize_text(test), normalize_text(expected)
+    if t == e or f" {e} " in f" {t} ":
+        return True, "normalized text contains expected"
+    t_tokens, e_tokens = set(t.split()), set(e.split())
+    if len(e_tokens) <= MAX_NAME_TOKENS and len(t_tokens) <= MAX_NAME_TOKENS and not (t_tokens & e_tokens):
+        return False, "no shared tokens"
+    return None, "free text differs"
+
+
+def _items_match(test_item: str, expected_item: str) -> bool:
+    t, e = set(test_item.split()), set(expected_item.split())
+    return bool(t) and bool(e) and (e <= t or t <= e)
+
+
+def _to_bool(value: Any) -> bool | None:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    text = normalize_text(value)
+    if text in TRUE_STRINGS:
+        return True
+    if text in FALSE_STRINGS:
+        return False
+    return None
+
+
+def _compare_bool(test, expected) -> tuple[bool | None, str]:
+    t, e = _to_bool(test), _to_bool(expected)
+    if t is None or e is None:
+        return None, f"not boolean: {test!r} vs expected {expected!r}"
+    return t == e, f"{t} vs expected {e}"
+
+
+def _compare_array(test, expected) -> tuple[bool | None, str]:
+    test_items = {normalize_text(v) for v in test} if isinstance(test, (list, tuple, set)) else {normalize_text(test)}
+    expected_items = {normalize_text(v) for v in expected}
+    covered = {e for e in expected_items if any(_items_match(t, e) for t in test_items)}
+    union = test_items | expected_items
+    jaccard = len(test_items & expected_items) / len(union) if union else 1.0
+    if covered == expected_items:
+        return True, f"all {len(expected_items)} expected items present (jaccard {jaccard:.2f})"
+    test_tokens = set(" ".join(test_items).split())
+    if not any(set(e.split()) & test_tokens for e in expected_items - covered):
+        return False, f"missing {sorted(expected_items - covered)}"
+    return None, f"partial overlap (jaccard {jaccard:.2f})"
+
+
+def compare_value(test: Any, expected: Any, prop_schema: dict | None = None) -> tuple[bool | None, str]:
+    """Return (match, reason); match is None when the value can't be decided deterministically."""
+    if _is_empty(expected):
+        return True, "nothing expected"
+    if _is_empty(test):
+        return False, "missing in test response"
+    kind = (prop_schema or {}).get("type") or _infer_type(expected)
+    if kind in NUMBER_TOLERANCE:
+        return _compare_number(test, expected, kind)
+    if kind == "boolean":
+        return _compare_bool(test, expected)
+    if kind == "array" and isinstance(expected, (list, tuple, set)):
+        return _compare_array(test, expected)
+    if kind == "string":
+        return _compare_string(test, expected)
+    return None, f"no deterministic comparator for {kind}"
+
+
+def compare_fields(test: dict, expected: dict, schema: dict | None = None) -> dict[str, FieldVerdict]:
+    """Compare every expected field; the schema's property types pick the comparator."""
+    properties = (schema or {}).get("properties", {})
+    verdicts = {}
+    for name, expected_value in expected.items():
+        match, reason = compare_value(test.get(name) if isinstance(test, dict) else None, expected_value, properties.get(name))
+        verdicts[name] = FieldVerdict(name, match, reason)
+    return verdicts
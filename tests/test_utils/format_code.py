@@ -1,32 +1,172 @@
+import codecs
+import fnmatch
+import hashlib
+from dataclasses import dataclass
 from pathlib import Path
 
-def folder_to_prompt_string(folder_paths: list[Path], file_extensions: list[str]= ['.py', '.json', '.sql', '.db'], exclude_files: list[str]= ['__init__.py']) -> str:
+from test_utils import disk_cache
+
+CACHE_NAMESPACE = "code_packer"
+DEFAULT_TOKEN_BUDGET = 60_000
+MAX_LINES_PER_FILE = 3000
+SNIFF_BYTES = 8192
+# Files the judge most needs to see get budget first
+PRIORITY_NAMES = ["main.py", "graph.py", "agent.py", "state.py", "prompts.py", "configuration.py", "utils.py", "langgraph.json"]
+ALWAYS_IGNORED = [".git/", "__pycache__/", ".venv/", "venv/", "node_modules/"]
+
+
+@dataclass
+class PackedFile:
+    relative_path: str
+    content: str
+    truncated: bool = False
+    omitted: bool = False
+
+
+class IgnoreRules:
+    """Minimal .gitignore matcher: comments, negation, dir-only and anchored patterns; last match wins."""
+
+    def __init__(self, patterns: list[str]):
+        self.rules = []
+        for raw in patterns:
+            line = raw.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            line = line[1:] if negate else line
+            dir_only = line.endswith("/")
+            line = line.strip("/") if dir_only else line
+            anchored = "/" in line.lstrip("/") or raw.lstrip().lstrip("!").startswith("/")
+            self.rules.append((line.lstrip("/"), negate, dir_only, anchored))
+
+    @classmethod
+    def from_folder(cls, folder: Path) -> "IgnoreRules":
+        gitignore = folder / ".gitignore"
+        patterns = list(ALWAYS_IGNORED)
+        if gitignore.is_file():
+            patterns += gitignore.read_text(encoding="utf-8", errors="ignore").splitlines()
+        return cls(patterns)
+
+    def ignored(self, relative_path: str, is_dir: bool) -> bool:
+        result = False
+        parts = relative_path.split("/")
+        for pattern, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if anchored:
+                hit = fnmatch.fnmatch(relative_path, pattern)
+            else:
+                hit = fnmatch.fnmatch(parts[-1], pattern)
+            if hit:
+                result = not negate
+        return result
+
+
+def _is_binary(path: Path) -> bool:
+    """Sniff the head of the file: NUL bytes or invalid UTF-8 mean binary."""
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+    if b"\0" in head:
+        return True
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return True
+    return False
+
+
+def _iter_files(folder: Path, file_extensions: list[str], exclude_files: list[str], recursive: bool):
+    rules = IgnoreRules.from_folder(folder)
+    pending = [folder]
+    while pending:
+        current = pending.pop()
+        for path in sorted(current.iterdir()):
+            rel = path.relative_to(folder).as_posix()
+            if rules.ignored(rel, path.is_dir()):
+                continue
+            if path.is_dir():
+                if recursive:
+                    pending.append(path)
+            elif path.suffix in file_extensions and path.name not in exclude_files and not _is_binary(path):
+                yield path
+
+
+def _priority(path: Path, extensions: list[str]) -> tuple:
+    name_rank = PRIORITY_NAMES.index(path.name) if path.name in PRIORITY_NAMES else len(PRIORITY_NAMES)
+    ext_rank = extensions.index(path.suffix) if path.suffix in extensions else len(extensions)
+    return (name_rank, ext_rank, path.stat().st_size)
+
+
+def _read_limited(path: Path, char_budget: int, max_lines: int) -> tuple[str, bool]:
+    """Stream lines until the line cap or char budget is hit; the rest of the file is only counted."""
+    kept, used, total, full = [], 0, 0, False
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            total += 1
+            if full or len(kept) >= max_lines or used + len(line) > char_budget:
+                full = True
+                continue
+            kept.append(line)
+            used += len(line)
+    content = "".join(kept)
+    truncated = len(kept) < total
+    if truncated:
+        content += f"\n\n... (truncated: showing first {len(kept)} of {total} lines)"
+    return content, truncated
+
+
+def _file_digest(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def pack_files(folder_paths: list[Path], file_extensions: list[str] = ['.py', '.json', '.sql', '.db'], exclude_files: list[str] = ['__init__.py'],
+               token_budget: int = DEFAULT_TOKEN_BUDGET, max_lines_per_file: int = MAX_LINES_PER_FILE, recursive: bool = False) -> list[PackedFile]:
+    """
+    Pack text files under folder_paths into a global token budget (~4 chars per token).
+    Higher-priority files are filled first; output keeps the original path order.
+    """
+    entries = []
+    for folder_path in folder_paths:
+        folder = Path(folder_path)
+        for file_path in _iter_files(folder, file_extensions, exclude_files, recursive):
+            entries.append((file_path, file_path.relative_to(folder).as_posix()))
+
+    remaining = token_budget * 4
+    packed = {}
+    for file_path, rel in sorted(entries, key=lambda e: _priority(e[0], file_extensions)):
+        if remaining <= 0:
+            packed[file_path] = PackedFile(rel, "... (omitted: token budget exhausted)", omitted=True)
+            continue
+        content, truncated = _read_limited(file_path, remaining, max_lines_per_file)
+        remaining -= len(content)
+        packed[file_path] = PackedFile(rel, content, truncated=truncated)
+    return [packed[file_path] for file_path, _ in entries]
+
+
+def folder_to_prompt_string(folder_paths: list[Path], file_extensions: list[str]= ['.py', '.json', '.sql', '.db'], exclude_files: list[str]= ['__init__.py'],
+                            token_budget: int = DEFAULT_TOKEN_BUDGET, recursive: bool = False) -> str:
     """
     Convert a list of folder paths to a prompt string.
+    Cached on the content hashes of the selected files, so unchanged trees are not re-packed.
     """
-    content = []
+    key_parts = [str(token_budget), str(recursive), ",".join(file_extensions), ",".join(exclude_files)]
     for folder_path in folder_paths:
-        for file_path in sorted(Path(folder_path).glob('*')):
-            if file_path.suffix in file_extensions and file_path.name not in exclude_files:
-                relative_path = file_path.relative_to(folder_path)
-                try:
-                    file_content = file_path.read_text(encoding='utf-8')
-                    # Limit to first 3000 lines to avoid filling context window
-                    lines = file_content.split('\n')
-                    if len(lines) > 3000:
-                        truncated_content = '\n'.join(lines[:3000])
-                        truncated_content += f"\n\n... (truncated: showing first 3000 of {len(lines)} lines)"
-                    else:
-                        truncated_content = file_content
-                    
-                    content.append(f"File Name: {relative_path}")
-                    content.append('-----------------------------')
-                    content.append(f"File Content: \n\n{truncated_content}\n\n")
-                except UnicodeDecodeError:
-                    print(f"Warning: Could not read file {file_path} as UTF-8")
-                    continue
-
-    return '\n\n'.join(content)
-
-    
-    
\ No newline at end of file
+        folder = Path(folder_path)
+        for file_path in _iter_files(folder, file_extensions, exclude_files, recursive):
+            key_parts += [file_path.relative_to(folder).as_posix(), _file_digest(file_path)]
+    key = disk_cache.content_key(*key_parts)
+
+    cached = disk_cache.read_text(CACHE_NAMESPACE, key, ".txt")
+    if cached is not None:
+        return cached
+
+    content = []
+    for packed in pack_files(folder_paths, file_extensions, exclude_files, token_budget, recursive=recursive):
+        content.append(f"File Name: {packed.relative_path}")
+        content.append('-----------------------------')
+        content.append(f"File Content: \n\n{packed.content}\n\n")
+
+    prompt = '\n\n'.join(content)
+    disk_cache.write_text(CACHE_NAMESPACE, key, prompt, ".txt")
+    return prompt
@@ -5,9 +5,15 @@ This module provides utilities to compare LangGraph workflows using
 various graph distance algorithms and similarity metrics.
 """
 
+import time
+import weakref
 import networkx as nx
-from typing import Dict, Any, Tuple
-import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+# Converted graphs keyed weakly by app, so caching a graph never keeps it alive
+_NX_CACHE: "weakref.WeakKeyDictionary[Any, nx.DiGraph]" = weakref.WeakKeyDictionary()
 
 def langgraph_to_networkx(app) -> nx.DiGraph:
     """Convert LangGraph to NetworkX directed graph"""
@@ -38,20 +44,77 @@ def langgraph_to_networkx(app) -> nx.DiGraph:
     
     return G
 
-def compute_graph_distances(app1, app2) -> float:
-    """Compute various distance metrics between two LangGraphs"""
-    G1 = langgraph_to_networkx(app1)
-    G2 = langgraph_to_networkx(app2)
+def cached_networkx(app) -> nx.DiGraph:
+    """Memoized langgraph_to_networkx; the gold graph is converted once per process"""
+    cached = _NX_CACHE.get(app)
+    if cached is None:
+        cached = _NX_CACHE[app] = langgraph_to_networkx(app)
+    return cached
+
+@dataclass(frozen=True)
+class GraphDistance:
+    """Bounds on the graph edit distance; exact when they meet (otherwise the search timed out)"""
+    lower: float
+    upper: float
+
+    @property
+    def exact(self) -> bool:
+        return self.lower == self.upper
+
+    @property
+    def value(self) -> float | None:
+        return self.upper if self.exact else None
+
+def size_lower_bound(G1: nx.DiGraph, G2: nx.DiGraph) -> float:
+    """Cheap admissible bound under the default unit costs: surplus nodes and edges must be inserted or deleted"""
+    return float(abs(len(G1) - len(G2)) + abs(G1.number_of_edges() - G2.number_of_edges()))
+
+def graph_distance_bounds(G1: nx.DiGraph, G2: nx.DiGraph, timeout: float = 60) -> GraphDistance:
+    """Tighten an anytime upper bound until it meets the lower bound, the search completes, or time runs out"""
+    lower = size_lower_bound(G1, G2)
+    upper = float("inf")
+    started = time.monotonic()
+    # Same cost model as nx.graph_edit_distance: substitutions are free, insertions/deletions cost 1
+    paths = nx.optimize_edit_paths(G1, G2, strictly_decreasing=True, timeout=timeout)
+    for _, _, cost in paths:
+        upper = float(cost)
+        if upper <= lower:
+            break
+    else:
+        # The generator finished before the deadline, so the last path is optimal
+        if time.monotonic() - started < timeout:
+            lower = upper
+    return GraphDistance(lower=min(lower, upper), upper=upper)
+
+def _bounds_worker(args) -> GraphDistance:
+    G1, G2, timeout = args
+    return graph_distance_bounds(G1, G2, timeout)
+
+def compute_graph_distances_batch(candidate_apps: list, gold_app, timeout: float = 60, max_workers: int | None = None) -> list[GraphDistance]:
+    """Score many candidates against one gold graph in a process pool"""
+    gold = cached_networkx(gold_app)
+    jobs = [(cached_networkx(app), gold, timeout) for app in candidate_apps]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_bounds_worker, jobs))
+
+def compute_graph_distances(app1, app2) -> GraphDistance:
+    """Compute various distance metrics between two LangGraphs
+
+    Returns the edit distance bounds: `.value` when exact, otherwise `.upper` is the
+    best edit path found before the timeout and `.lower` a proven lower bound.
+    """
+    G1 = cached_networkx(app1)
+    G2 = cached_networkx(app2)
     
     results = {}
     
-    # 1. Graph Edit Distance (if graphs are small enough)
+    # 1. Graph Edit Distance, bounded: exact when the bounds meet or the search completes
     try:
-        edit_dist = nx.graph_edit_distance(G1, G2, timeout=60)
-        print(f"Edit distance: {edit_dist}")
-        results['edit_distance'] = edit_dist
+        bounds = graph_distance_bounds(G1, G2, timeout=60)
+        print(f"Edit distance bounds: [{bounds.lower}, {bounds.upper}] (exact={bounds.exact})")
+        results['edit_distance'] = bounds
     except Exception as e:
         print(f"Edit distance failed: {e}")
-        results['edit_distance'] = float('inf')
+        results['edit_distance'] = GraphDistance(lower=0.0, upper=float('inf'))
     
     return results['edit_distance']
\ No newline at end of file
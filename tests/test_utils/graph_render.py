@@ -0,0 +1,160 @@
+"""
+Offline, hash-cached rendering of LangGraph structures.
+
+`draw_mermaid_png()` goes through the remote mermaid.ink renderer. This module
+renders locally instead: Graphviz (`dot`) to PNG when it is installed, otherwise
+a pure-Python layered layout to SVG. Output is cached by a hash of the graph
+structure, so unchanged graphs (e.g. the gold graph) are never re-rendered.
+
+Set GRAPH_RENDER_BACKEND to "graphviz", "svg" or "mermaid" (remote) to force a backend.
+"""
+
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+from html import escape
+
+from test_utils import disk_cache
+
+CACHE_NAMESPACE = "graph_render"
+BACKEND_SUFFIX = {"graphviz": ".png", "mermaid": ".png", "svg": ".svg"}
+
+
+def graph_structure(app) -> dict:
+    """Canonical, render-relevant structure of a compiled graph"""
+    graph = app.get_graph()
+    nodes = sorted(node.name for node in graph.nodes.values())
+    names = {node_id: node.name for node_id, node in graph.nodes.items()}
+    edges = sorted(
+        [names.get(e.source, e.source), names.get(e.target, e.target), bool(e.conditional)]
+        for e in graph.edges
+    )
+    return {"nodes": nodes, "edges": edges}
+
+
+def structure_hash(structure: dict) -> str:
+    return disk_cache.content_key(json.dumps(structure, sort_keys=True))
+
+
+def _resolve_backend(backend: str | None) -> str:
+    backend = (backend or os.getenv("GRAPH_RENDER_BACKEND", "auto")).strip().lower()
+    if backend == "auto":
+        return "graphviz" if shutil.which("dot") else "svg"
+    if backend not in BACKEND_SUFFIX:
+        raise ValueError(f"Unknown graph render backend: {backend}")
+    return backend
+
+
+def _to_dot(structure: dict) -> str:
+    lines = ["digraph G {", "  rankdir=TB;", '  node [shape=box, style="rounded,filled", fillcolor="#f2f0ff", fontname="Helvetica"];']
+    for name in structure["nodes"]:
+        lines.append(f"  {json.dumps(name)};")
+    for source, target, conditional in structure["edges"]:
+        style = " [style=dashed]" if conditional else ""
+        lines.append(f"  {json.dumps(source)} -> {json.dumps(target)}{style};")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def _render_graphviz(structure: dict) -> bytes:
+    proc = subprocess.run(["dot", "-Tpng"], input=_to_dot(structure).encode(), capture_output=True, check=True)
+    return proc.stdout
+
+
+def _layers(structure: dict) -> dict[str, int]:
+    """Longest-path layering from __start__, ignoring back edges so cycles still lay out"""
+    successors: dict[str, list[str]] = {name: [] for name in structure["nodes"]}
+    for source, target, _ in structure["edges"]:
+        successors.setdefault(source, []).append(target)
+
+    depth: dict[str, int] = {}
+    on_stack: set[str] = set()
+
+    def visit(name: str, d: int):
+        if name in on_stack or depth.get(name, -1) >= d:
+            return
+        depth[name] = d
+        on_stack.add(name)
+        for nxt in successors.get(name, []):
+            visit(nxt, d + 1)
+        on_stack.discard(name)
+
+    roots = ["__start__"] if "__start__" in successors else list(successors)
+    for root in roots:
+        visit(root, 0)
+    for name in successors:
+        depth.setdefault(name, 0)
+    if "__end__" in depth:
+        depth["__end__"] = max(depth.values())
+    return depth
+
+
+def _render_svg(structure: dict) -> bytes:
+    """Dependency-free layered layout; conditional edges dashed, back edges routed on the right"""
+    depth = _layers(structure)
+    rows: dict[int, list[str]] = {}
+    for name in structure["nodes"]:
+        rows.setdefault(depth[name], []).append(name)
+
+    box_h, row_gap, col_gap, pad = 36, 64, 32, 40
+    widths = {name: 16 + 8 * len(name) for name in structure["nodes"]}
+    row_widths = {r: sum(widths[n] for n in names) + col_gap * (len(names) - 1) for r, names in rows.items()}
+    canvas_w = max(row_widths.values(), default=0) + 2 * pad + 80
+    canvas_h = (max(rows, default=0) + 1) * (box_h + row_gap) + 2 * pad - row_gap
+
+    pos = {}
+    for r, names in rows.items():
+        x = (canvas_w - 80 - row_widths[r]) / 2
+        y = pad + r * (box_h + row_gap)
+        for name in names:
+            pos[name] = (x, y, widths[name])
+            x += widths[name] + col_gap
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{canvas_w:.0f}" height="{canvas_h:.0f}" font-family="Helvetica" font-size="13">',
+        '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="7" markerHeight="7" orient="auto">'
+        '<path d="M0,0 L10,5 L0,10 z" fill="#333"/></marker></defs>',
+    ]
+    for source, target, conditional in structure["edges"]:
+        sx, sy, sw = pos[source]
+        tx, ty, tw = pos[target]
+        dash = ' stroke-dasharray="5,4"' if conditional else ""
+        if depth[target] > depth[source]:
+            d = f"M{sx + sw / 2:.1f},{sy + box_h} L{tx + tw / 2:.1f},{ty}"
+        else:
+            bend = canvas_w - pad / 2
+            d = f"M{sx + sw:.1f},{sy + box_h / 2} C{bend:.1f},{sy + box_h / 2} {bend:.1f},{ty + box_h / 2} {tx + tw:.1f},{ty + box_h / 2}"
+        parts.append(f'<path d="{d}" fill="none" stroke="#333"{dash} marker-end="url(#arrow)"/>')
+    for name, (x, y, w) in pos.items():
+        parts.append(f'<rect x="{x:.1f}" y="{y}" width="{w}" height="{box_h}" rx="8" fill="#f2f0ff" stroke="#6b5fd3"/>')
+        parts.append(f'<text x="{x + w / 2:.1f}" y="{y + box_h / 2 + 4}" text-anchor="middle">{escape(name)}</text>')
+    parts.append("</svg>")
+    return "\n".join(parts).encode("utf-8")
+
+
+def render_graph(app, out_path: str | pathlib.Path, backend: str | None = None) -> pathlib.Path:
+    """Render `app`'s graph to out_path (suffix follows the backend) and return the written path."""
+    backend = _resolve_backend(backend)
+    out_path = pathlib.Path(out_path).with_suffix(BACKEND_SUFFIX[backend])
+    structure = graph_structure(app)
+    key = disk_cache.content_key(backend, structure_hash(structure))
+
+    data = disk_cache.read_bytes(CACHE_NAMESPACE, key, BACKEND_SUFFIX[backend])
+    if data is None:
+        if backend == "graphviz":
+            data = _render_graphviz(structure)
+        elif backend == "svg":
+            data = _render_svg(structure)
+        else:
+            data = app.get_graph().draw_mermaid_png()
+        disk_cache.write_bytes(CACHE_NAMESPACE, key, data, BACKEND_SUFFIX[backend])
+
+    # Leave an up-to-date file untouched
+    if not (out_path.exists() and out_path.read_bytes() == data):
+        out_path.write_bytes(data)
+    # A render from another backend (e.g. .png before dot was uninstalled) would now be stale
+    for suffix in set(BACKEND_SUFFIX.values()) - {out_path.suffix}:
+        out_path.with_suffix(suffix).unlink(missing_ok=True)
+    return out_path
@@ -0,0 +1,62 @@
+"""
+Content-hash verdict cache for the LLM judge.
+
+A verdict is keyed on everything that can change it: the judge model, the fully
+rendered prompt (template, task, expert code, packed candidate code and human
+notes as the judge sees them) and RUBRIC_VERSION. Unchanged candidates are
+rescored from the stored, parsed judge output.
+
+JUDGE_CACHE=on (default) reads and writes, "refresh" re-queries and overwrites,
+"off" bypasses the cache. Bump RUBRIC_VERSION in prompt.py, or run
+`python -m test_utils.judge_cache --clear` (from tests/), to invalidate every entry.
+"""
+
+import os
+import sys
+from typing import TypeVar
+
+from pydantic import BaseModel
+
+from test_utils import disk_cache
+from test_utils.prompt import RUBRIC_VERSION
+
+CACHE_NAMESPACE = "judge_verdicts"
+M = TypeVar("M", bound=BaseModel)
+
+
+def cache_mode() -> str:
+    return os.getenv("JUDGE_CACHE", "on").strip().lower()
+
+
+def verdict_key(model_name: str, system_prompt: str, user_message: str, *extra: str) -> str:
+    """Key on the rendered messages, so editing any part of the prompt (or the expert code) misses the cache."""
+    return disk_cache.content_key(RUBRIC_VERSION, model_name, system_prompt, user_message, *extra)
+
+
+def load_verdict(key: str, model_cls: type[M]) -> M | None:
+    if cache_mode() != "on":
+        return None
+    raw = disk_cache.read_text(CACHE_NAMESPACE, key, ".json")
+    if raw is None:
+        return None
+    try:
+        return model_cls.model_validate_json(raw)
+    except ValueError:
+        # Schema changed since the entry was written; treat as a miss
+        return None
+
+
+def store_verdict(key: str, verdict: BaseModel) -> None:
+    if cache_mode() == "off":
+        return
+    disk_cache.write_text(CACHE_NAMESPACE, key, verdict.model_dump_json(), ".json")
+
+
+def clear_verdicts() -> None:
+    disk_cache.clear(CACHE_NAMESPACE)
+
+
+if __name__ == "__main__":
+    if "--clear" in sys.argv[1:]:
+        clear_verdicts()
+        print(f"Cleared {disk_cache.CACHE_DIR / CACHE_NAMESPACE}")
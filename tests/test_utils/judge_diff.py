@@ -0,0 +1,145 @@
+"""
+Diff-against-gold inputs for the LLM judge.
+
+Instead of the full EXPERT_CODE and the full packed candidate tree, the judge
+gets a structural summary of the expert implementation and a unified diff of
+each candidate file against its expert counterpart (matched by name, else by
+similarity). A candidate file with no similar expert file is diffed against the
+closest expert file when that diff is shorter than the file; otherwise it is
+sent as an outline (signatures, docstrings, constants, graph wiring) capped at
+NEW_FILE_BUDGET characters. Expert files the candidate lacks are listed.
+"""
+
+import ast
+import difflib
+import re
+
+from test_utils.format_code import PackedFile
+from test_utils.prompt import EXPERT_CODE
+
+CONTEXT_LINES = 3
+MIN_SIMILARITY = 0.5
+NEW_FILE_BUDGET = 3000  # characters of outline sent for a candidate file unlike any expert file
+GRAPH_WIRING_CALLS = {"add_node", "add_edge", "add_conditional_edges", "compile", "StateGraph"}
+_FILE_BLOCK = re.compile(r"File Name: (?P<name>\S+)\s*\n-+\s*\nFile Content: \n\n(?P<body>.*?)(?=\n\s*File Name: |\Z)", re.S)
+
+
+def expert_files(expert_code: str = EXPERT_CODE) -> dict[str, str]:
+    """Split EXPERT_CODE into {file name: source}, undoing the str.format brace escaping."""
+    files = {}
+    for match in _FILE_BLOCK.finditer(expert_code):
+        body = match.group("body").replace("{{", "{").replace("}}", "}")
+        files[match.group("name")] = body.strip("\n") + "\n"
+    return files
+
+
+def _first_line(doc: str | None) -> str:
+    return doc.strip().splitlines()[0] if doc and doc.strip() else ""
+
+
+def _summarize_python(source: str) -> list[str]:
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return ["  (unparseable)"]
+    lines = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+            returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+            lines.append(f"  {prefix} {node.name}({ast.unparse(node.args)}){returns}: {_first_line(ast.get_docstring(node))}")
+        elif isinstance(node, ast.ClassDef):
+            bases = ", ".join(ast.unparse(b) for b in node.bases)
+            decorators = "".join(f"@{ast.unparse(d)} " for d in node.decorator_list)
+            fields = [ast.unparse(s.target) for s in node.body if isinstance(s, ast.AnnAssign)]
+            methods = [s.name for s in node.body if isinstance(s, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            lines.append(f"  {decorators}class {node.name}({bases}): fields={fields} methods={methods}")
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            value = node.value
+            name = ", ".join(ast.unparse(t) for t in targets)
+            if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                lines.append(f"  {name} = <str, {len(value.value)} chars: {_first_line(value.value)[:80]!r}>")
+            elif value is not None:
+                lines.append(f"  {name} = {ast.unparse(value)[:120]}")
+        elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+            func = node.value.func
+            if getattr(func, "attr", getattr(func, "id", "")) in GRAPH_WIRING_CALLS:
+                lines.append(f"  {ast.unparse(node.value)}")
+    return lines
+
+
+def structural_summary(files: dict[str, str]) -> str:
+    """Top-level definitions, prompt constants and graph wiring of each expert file."""
+    parts = []
+    for name, source in files.items():
+        parts.append(f"File: {name}")
+        parts.extend(_summarize_python(source) if name.endswith(".py") else [f"  ({len(source.splitlines())} lines)"])
+        parts.append("")
+    return "\n".join(parts)
+
+
+def _similarity(expert_source: str, content: str, floor: float) -> float:
+    matcher = difflib.SequenceMatcher(None, expert_source, content, autojunk=False)
+    if matcher.real_quick_ratio() < floor or matcher.quick_ratio() < floor:
+        return 0.0
+    return matcher.ratio()
+
+
+def _best_counterpart(rel_path: str, content: str, expert: dict[str, str], floor: float = MIN_SIMILARITY) -> str | None:
+    base = rel_path.rsplit("/", 1)[-1]
+    if base in expert:
+        return base
+    best, best_ratio = None, floor
+    for name, source in expert.items():
+        ratio = _similarity(source, content, best_ratio)
+        if ratio >= best_ratio and ratio > 0:
+            best, best_ratio = name, ratio
+    return best
+
+
+def _unified(expert_name: str, expert_source: str, f: PackedFile) -> str:
+    diff = difflib.unified_diff(
+        expert_source.splitlines(keepends=True),
+        f.content.splitlines(keepends=True),
+        fromfile=f"expert/{expert_name}",
+        tofile=f"candidate/{f.relative_path}",
+        n=CONTEXT_LINES,
+    )
+    return "".join(diff)
+
+
+def _outline(f: PackedFile, budget: int = NEW_FILE_BUDGET) -> str:
+    """Structural outline of a file, or its head for non-Python files, cut to `budget` characters."""
+    lines = _summarize_python(f.content) if f.relative_path.endswith(".py") else f.content.splitlines()
+    text = "\n".join(lines)
+    if len(text) > budget:
+        text = text[:budget].rsplit("\n", 1)[0] + f"\n  ... ({len(text) - budget} more characters not shown)"
+    return f"{text}\n({len(f.content.splitlines())} lines in total)\n"
+
+
+def candidate_diff(packed: list[PackedFile], expert: dict[str, str]) -> str:
+    """Unified diffs of candidate files against their expert counterparts; outlines for files unlike any."""
+    parts, matched = [], set()
+    for f in packed:
+        counterpart = None if f.omitted else _best_counterpart(f.relative_path, f.content, expert)
+        if counterpart is None:
+            if f.omitted:
+                parts.append(f"New file (no expert counterpart): {f.relative_path}\n-----------------------------\n{f.content}\n")
+                continue
+            # Restructured code: diff against the closest expert file when that is the shorter view
+            closest = _best_counterpart(f.relative_path, f.content, expert, floor=0.0)
+            body = _unified(closest, expert[closest], f) if closest else ""
+            if body and len(body) < len(f.content):
+                parts.append(f"Diff (closest expert file): expert/{closest} -> candidate/{f.relative_path}\n-----------------------------\n{body}")
+            else:
+                parts.append(f"New file outline (no expert counterpart): {f.relative_path}\n-----------------------------\n{_outline(f)}")
+            continue
+        matched.add(counterpart)
+        body = _unified(counterpart, expert[counterpart], f) or "(identical to expert)\n"
+        parts.append(f"Diff: expert/{counterpart} -> candidate/{f.relative_path}\n-----------------------------\n{body}")
+
+    missing = [name for name in expert if name not in matched]
+    if missing:
+        parts.append("Expert files with no candidate counterpart: " + ", ".join(missing))
+    return "\n\n".join(parts)
@@ -0,0 +1,104 @@
+"""
+Multi-sample LLM judge ensemble.
+
+Fires N judge samples concurrently and aggregates them into one verdict of the
+same schema: booleans by strict majority, evidence lists by clustering
+near-duplicate issues across samples and keeping the clusters reported by at
+least half of the samples. Per-field agreement (share of samples that agree
+with the aggregate) is reported alongside.
+"""
+
+import asyncio
+import re
+from collections import Counter
+from typing import Awaitable, Callable, TypeVar
+
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+SEVERITY_ORDER = ["minor", "major", "critical"]
+ISSUE_SIMILARITY = 0.5
+
+
+async def sample_verdicts(ainvoke: Callable[[], Awaitable[M]], n: int) -> list[M]:
+    """Run n judge calls concurrently; failed samples are dropped unless all fail."""
+    results = await asyncio.gather(*(ainvoke() for _ in range(n)), return_exceptions=True)
+    samples = [r for r in results if not isinstance(r, BaseException)]
+    if not samples:
+        raise results[0]
+    return samples
+
+
+def _tokens(text: str) -> set[str]:
+    return set(re.findall(r"[a-z0-9_]+", text.lower()))
+
+
+def _similar(a: set[str], b: set[str]) -> bool:
+    if not a or not b:
+        return a == b
+    return len(a & b) / len(a | b) >= ISSUE_SIMILARITY
+
+
+def _aggregate_evidence(lists: list[list[BaseModel]]) -> tuple[list[BaseModel], float]:
+    """Cluster issues across samples; keep clusters supported by at least half the samples."""
+    clusters: list[dict] = []  # {"tokens", "items", "samples"}
+    for sample_idx, items in enumerate(lists):
+        for item in items:
+            tokens = _tokens(item.issue)
+            for cluster in clusters:
+                if _similar(tokens, cluster["tokens"]):
+                    cluster["items"].append(item)
+                    cluster["samples"].add(sample_idx)
+                    break
+            else:
+                clusters.append({"tokens": tokens, "items": [item], "samples": {sample_idx}})
+
+    n = len(lists)
+    kept, support = [], []
+    for cluster in clusters:
+        if len(cluster["samples"]) * 2 < n:
+            continue
+        severities = sorted(
+            (getattr(item, "severity", "major") for item in cluster["items"]),
+            key=lambda s: SEVERITY_ORDER.index(s) if s in SEVERITY_ORDER else 1,
+        )
+        representative = cluster["items"][0].model_copy(update={"severity": severities[len(severities) // 2]})
+        kept.append(representative)
+        support.append(len(cluster["samples"]) / n)
+
+    # Agreement: how consistently the samples reported the kept issues (1.0 when none were kept)
+    dropped = sum(1 for cluster in clusters if len(cluster["samples"]) * 2 < n)
+    agreement = sum(support) / (len(support) + dropped) if clusters else 1.0
+    return kept, agreement
+
+
+def aggregate_verdicts(samples: list[M], prefix: str = "") -> tuple[M, dict[str, float]]:
+    """Aggregate samples field by field; returns (verdict, {field path: agreement})."""
+    first = samples[0]
+    n = len(samples)
+    values, agreement = {}, {}
+    for name in type(first).model_fields:
+        path = f"{prefix}{name}"
+        field_values = [getattr(s, name) for s in samples]
+        if isinstance(field_values[0], BaseModel):
+            values[name], nested = aggregate_verdicts(field_values, prefix=f"{path}.")
+            agreement.update(nested)
+        elif isinstance(field_values[0], bool):
+            majority = sum(field_values) * 2 > n
+            values[name] = majority
+            agreement[path] = sum(v == majority for v in field_values) / n
+        elif isinstance(field_values[0], list) and all(hasattr(i, "issue") for v in field_values for i in v):
+            values[name], agreement[path] = _aggregate_evidence(field_values)
+        else:
+            counts = Counter(repr(v) for v in field_values)
+            top = counts.most_common(1)[0][0]
+            values[name] = next(v for v in field_values if repr(v) == top)
+            agreement[path] = counts[top] / n
+    return type(first)(**values), agreement
+
+
+async def run_ensemble(ainvoke: Callable[[], Awaitable[M]], n: int) -> tuple[M, dict[str, float]]:
+    samples = await sample_verdicts(ainvoke, n)
+    verdict, agreement = aggregate_verdicts(samples)
+    agreement["samples"] = len(samples)
+    return verdict, agreement
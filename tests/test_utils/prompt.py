@@ -1,3 +1,7 @@
+# Bump when the rubric or scoring changes in a way the prompt template alone doesn't capture;
+# it is part of every cached judge verdict's key.
+RUBRIC_VERSION = "1"
+
 LLM_AS_A_JUDGE_PROMPT = '''
 You are an expert coding evaluator for coding agent that researches company information. You will be provided with a coding agent's implementation and an expert-written implementation that represents the gold standard.
 
@@ -81,6 +85,13 @@ The human annotator added the following notes when running the code:
 {human_notes}
 '''
 
+# Prepended to the candidate input in diff mode (JUDGE_MODE=diff)
+DIFF_MODE_NOTE = """The expert implementation above is given as a structural summary (signatures, prompt constants, graph wiring).
+The coding agent implementation below is given as unified diffs against the matching expert file ("-" lines are expert-only, "+" lines are candidate-only, unprefixed lines are shared context).
+Files with no expert counterpart are diffed against the closest expert file, or shown as an outline (signatures, docstrings, constants, graph wiring) when no expert file is close. Treat code not shown in a diff as identical to the expert.
+
+"""
+
 USER_TASK = '''
 Create me a company researcher built using langgraph. It should be a multi-node graph. The user should be expected to provide the name of the company and the optional notes if they want. There should be a set maximum search queries that we should do per company and max search results. The LLM should generate the queries that should be searched using the Tavily API to fill the following structured object
 
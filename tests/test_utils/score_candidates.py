@@ -0,0 +1,271 @@
+"""
+Parallel multi-candidate scoring runner.
+
+Scores many candidate directories or git branches concurrently. Every candidate
+runs the harness in its own pytest subprocess against a private copy of its
+tree, so module state (`sys.modules`, `_load_module`, `agent*` reloads) never
+leaks between candidates. Workers get a wall-clock timeout and resource caps,
+and all per-bucket results are merged into one leaderboard.
+
+Usage (from the harness root):
+    python tests/test_utils/score_candidates.py --dir ../cand_a --dir ../cand_b
+    python tests/test_utils/score_candidates.py --repo .. --branch claude-1 --branch claude-2 --workers 8
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tarfile
+import time
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+
+HARNESS_ROOT = pathlib.Path(__file__).resolve().parents[2]
+UNKNOWN_COMMIT = "unknown"  # CANDIDATE_COMMIT for a candidate with no git commit; bootstrap.UNKNOWN_COMMIT
+TESTS_DIR = HARNESS_ROOT / "tests"
+DEFAULT_TESTS = sorted(str(p) for p in TESTS_DIR.glob("test_0*.py"))
+IGNORED_DIRS = {".git", "__pycache__", ".venv", "venv", "node_modules", ".pytest_cache", ".mypy_cache", ".ruff_cache"}
+# Overrides that would point a worker back at the caller's candidate instead of its private copy
+CANDIDATE_PATH_ENV = ("CANDIDATE_AGENT_PATH", "LG_CONFIG_PATH")
+
+
+@dataclass
+class Candidate:
+    name: str
+    source: str  # directory path, or "<repo>@<branch>"
+    kind: str  # "dir" | "branch"
+
+
+@dataclass
+class WorkerResult:
+    candidate: str
+    status: str  # "ok" | "failed" | "timeout" | "error"
+    returncode: int | None
+    duration_s: float
+    log_path: str
+    scores: dict = field(default_factory=dict)
+    error: str = ""
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", name).strip("-") or "candidate"
+
+
+def _run_slug(candidate: Candidate) -> str:
+    """Work-dir name: readable slug plus a hash of the source, so e.g. `a/b` and `a-b` never share a dir."""
+    digest = hashlib.sha1(candidate.source.encode()).hexdigest()[:8]
+    return f"{_slug(candidate.name)}-{digest}"
+
+
+def _copy_dir(src: pathlib.Path, dst: pathlib.Path):
+    """Copy a candidate tree, skipping VCS/venv dirs and the harness itself if nested inside."""
+    def _ignore(dirpath, names):
+        skipped = set()
+        for name in names:
+            if name in IGNORED_DIRS:
+                skipped.add(name)
+            elif (pathlib.Path(dirpath) / name).resolve() == HARNESS_ROOT:
+                skipped.add(name)
+        return skipped
+    shutil.copytree(src, dst, ignore=_ignore, symlinks=True)
+
+
+def _export_branch(repo: pathlib.Path, branch: str, dst: pathlib.Path):
+    """Materialize a branch without touching the repo's worktree (git archive | untar)."""
+    archive = subprocess.run(
+        ["git", "-C", str(repo), "archive", "--format=tar", branch],
+        capture_output=True, check=True,
+    )
+    dst.mkdir(parents=True)
+    with tarfile.open(fileobj=io.BytesIO(archive.stdout)) as tar:
+        tar.extractall(dst, filter="data")
+
+
+def _prepare(candidate: Candidate, work_root: pathlib.Path) -> pathlib.Path:
+    """Build `<work>/<slug>/candidate/.harness`, the cwd the harness expects (candidate at `..`)."""
+    candidate_dir = work_root / _run_slug(candidate) / "candidate"
+    if candidate_dir.exists():
+        shutil.rmtree(candidate_dir)
+    if candidate.kind == "dir":
+        _copy_dir(pathlib.Path(candidate.source).resolve(), candidate_dir)
+    else:
+        repo, branch = candidate.source.rsplit("@", 1)
+        _export_branch(pathlib.Path(repo).resolve(), branch, candidate_dir)
+
+    run_dir = candidate_dir / ".harness"
+    for sub in ("results", "txt_dump"):
+        (run_dir / sub).mkdir(parents=True, exist_ok=True)
+    (run_dir / "expert_src").symlink_to(HARNESS_ROOT / "expert_src", target_is_directory=True)
+    return run_dir
+
+
+# Runs in the child: set the caps, then exec the real command. Avoids preexec_fn, which
+# is unsafe to use from threads. RLIMIT_DATA caps allocated memory without counting the
+# large PROT_NONE address-space reservations torch/grpc make (RLIMIT_AS would).
+_LIMIT_SHIM = """\
+import os, resource, sys
+memory_mb, cpu_s = int(sys.argv[1]), int(sys.argv[2])
+if memory_mb:
+    resource.setrlimit(resource.RLIMIT_DATA, (memory_mb * 1024 * 1024,) * 2)
+if cpu_s:
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_s, cpu_s))
+os.execv(sys.argv[3], sys.argv[3:])
+"""
+
+
+def _with_limits(cmd: list[str], memory_mb: int | None, cpu_s: int | None) -> list[str]:
+    """Wrap cmd so the child applies the per-worker resource caps to itself before exec."""
+    if not (memory_mb or cpu_s):
+        return cmd
+    return [sys.executable, "-c", _LIMIT_SHIM, str(memory_mb or 0), str(cpu_s or 0), *cmd]
+
+
+def _candidate_commit(candidate: Candidate) -> str | None:
+    """The commit being scored: the branch tip, or HEAD of a directory that is a git checkout."""
+    if candidate.kind == "branch":
+        repo, rev = candidate.source.rsplit("@", 1)
+    else:
+        repo, rev = candidate.source, "HEAD"
+    proc = subprocess.run(["git", "-C", repo, "rev-parse", "--verify", f"{rev}^{{commit}}"],
+                          capture_output=True, text=True)
+    return proc.stdout.strip() if proc.returncode == 0 else None
+
+
+def _collect_scores(run_dir: pathlib.Path) -> dict:
+    scores = {}
+    for path in sorted((run_dir / "results").glob("*.json")):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, json.JSONDecodeError):
+            continue
+        if isinstance(data, dict) and "bucket" in data:
+            scores[data["bucket"]] = {
+                "points": data.get("points", 0),
+                "max_points": data.get("max_points", 0),
+                "details": {d["key"]: {"points": d.get("points", 0), "passed": d.get("passed")}
+                            for d in data.get("details", []) if isinstance(d, dict) and "key" in d},
+            }
+    return scores
+
+
+def run_worker(candidate: Candidate, work_root: pathlib.Path, tests: list[str], timeout_s: float,
+               memory_mb: int | None = None, cpu_s: int | None = None, extra_env: dict | None = None) -> WorkerResult:
+    """Score one candidate in an isolated pytest subprocess."""
+    started = time.monotonic()
+    log_path = work_root / _run_slug(candidate) / "pytest.log"
+    try:
+        run_dir = _prepare(candidate, work_root)
+    except Exception as e:
+        return WorkerResult(candidate.name, "error", None, time.monotonic() - started, str(log_path),
+                            error=f"prepare failed: {type(e).__name__}: {e}")
+
+    env = {k: v for k, v in os.environ.items() if k not in CANDIDATE_PATH_ENV}
+    env.update({"CANDIDATE_NAME": candidate.name, "PYTHONDONTWRITEBYTECODE": "1"})
+    # Always set: unset, bootstrap would attribute results to the harness repo's HEAD
+    env["CANDIDATE_COMMIT"] = _candidate_commit(candidate) or UNKNOWN_COMMIT
+    # All workers append to one shared score history
+    env.setdefault("RESULTS_DB", str(HARNESS_ROOT / "results" / "results.db"))
+    env.update(extra_env or {})
+    cmd = _with_limits([sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", *tests], memory_mb, cpu_s)
+
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen(
+            cmd, cwd=run_dir, env=env, stdout=log, stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+        try:
+            returncode = proc.wait(timeout=timeout_s)
+            status = "ok" if returncode == 0 else "failed"
+        except subprocess.TimeoutExpired:
+            # Kill the whole process group so candidate-spawned children don't linger
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+            returncode, status = None, "timeout"
+
+    return WorkerResult(candidate.name, status, returncode, time.monotonic() - started, str(log_path),
+                        scores=_collect_scores(run_dir))
+
+
+def build_leaderboard(results: list[WorkerResult]) -> list[dict]:
+    """Merge per-bucket scores into one ranking, best total first."""
+    rows = []
+    for r in results:
+        points = sum(s["points"] for s in r.scores.values())
+        max_points = sum(s["max_points"] for s in r.scores.values())
+        rows.append({
+            "candidate": r.candidate,
+            "points": points,
+            "max_points": max_points,
+            "buckets": r.scores,
+            "status": r.status,
+            "duration_s": round(r.duration_s, 2),
+            "log": r.log_path,
+            "error": r.error,
+        })
+    rows.sort(key=lambda row: (-row["points"], row["candidate"]))
+    return rows
+
+
+def score_candidates(candidates: list[Candidate], work_root: pathlib.Path, tests: list[str] = DEFAULT_TESTS,
+                     workers: int | None = None, timeout_s: float = 1800, memory_mb: int | None = 4096,
+                     cpu_s: int | None = None, extra_env: dict | None = None) -> list[WorkerResult]:
+    """Score all candidates concurrently; each worker is an isolated subprocess."""
+    names = [c.name for c in candidates]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Candidate names must be unique: {names}")
+    work_root.mkdir(parents=True, exist_ok=True)
+    # Workers mostly wait on the network, so size the pool past the core count
+    workers = workers or min(len(candidates), 16)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(run_worker, c, work_root, tests, timeout_s, memory_mb, cpu_s, extra_env) for c in candidates]
+        return [f.result() for f in futures]
+
+
+def _parse_candidates(args) -> list[Candidate]:
+    candidates = [Candidate(pathlib.Path(d).resolve().name, d, "dir") for d in args.dir]
+    candidates += [Candidate(b, f"{args.repo}@{b}", "branch") for b in args.branch]
+    return candidates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score many candidates concurrently in isolated workers.")
+    parser.add_argument("--dir", action="append", default=[], help="Candidate directory (repeatable)")
+    parser.add_argument("--branch", action="append", default=[], help="Candidate branch in --repo (repeatable)")
+    parser.add_argument("--repo", default=str(HARNESS_ROOT.parent), help="Git repo holding candidate branches")
+    parser.add_argument("--tests", nargs="+", default=DEFAULT_TESTS, help="Harness test files to run")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=1800, help="Per-candidate wall-clock timeout (s)")
+    parser.add_argument("--memory-mb", type=int, default=4096, help="Per-worker data-segment cap (0 = none)")
+    parser.add_argument("--cpu-s", type=int, default=0, help="Per-worker CPU-time cap (0 = none)")
+    parser.add_argument("--work-dir", default=str(HARNESS_ROOT / ".runs"))
+    parser.add_argument("--out", default=str(HARNESS_ROOT / "results" / "leaderboard.json"))
+    args = parser.parse_args(argv)
+
+    candidates = _parse_candidates(args)
+    if not candidates:
+        parser.error("pass at least one --dir or --branch")
+
+    results = score_candidates(candidates, pathlib.Path(args.work_dir), [str(pathlib.Path(t).resolve()) for t in args.tests],
+                               args.workers, args.timeout, args.memory_mb or None, args.cpu_s or None)
+    leaderboard = build_leaderboard(results)
+
+    out = pathlib.Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"leaderboard": leaderboard, "workers": [asdict(r) for r in results]}, f, indent=2)
+
+    for rank, row in enumerate(leaderboard, 1):
+        print(f"{rank:>3}. {row['candidate']:<40} {row['points']:>6}/{row['max_points']:<4} {row['status']:<8} {row['duration_s']}s")
+    print(f"Leaderboard written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Local HTTP stand-ins for the Anthropic Messages and Tavily APIs, for load testing.
+
+The real client stack (anthropic SDK / ChatAnthropic, httpx pools, rate limiters,
+retries, AsyncTavilyClient) talks to these over HTTP exactly as it would to the
+real services, so saturation points and concurrency settings can be tuned
+without spending quota.
+
+- Anthropic `POST /v1/messages`: when the request forces a tool (what
+  `with_structured_output` does), replies with a `tool_use` block whose input is
+  synthesized from the tool's `input_schema`; otherwise replies with text.
+  Streaming is not supported.
+- Tavily `POST /search` and `POST /extract`: deterministic results derived from
+  the query / URLs, with `raw_content` when requested.
+- Faults: per-request latency (mean + jitter), random 429 / 5xx injection, a
+  requests-per-second cap and an in-flight cap (both answered with 429 and
+  `retry-after`, like the real rate limits).
+- `GET /_stats` returns request counts, statuses, peak concurrency and bytes sent.
+
+Usage (from the harness root):
+    python tests/test_utils/standin_api.py --latency-ms 800 --jitter-ms 400 --rate-429 0.02 --max-rps 20
+then point the agent at the printed ANTHROPIC_API_URL / TAVILY_API_URL.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ARRAY_ITEMS = 3  # items synthesized per array (e.g. search queries)
+
+
+@dataclass
+class StandinConfig:
+    latency_ms: float = 0.0  # mean added latency per request
+    jitter_ms: float = 0.0  # uniform +/- jitter around the mean
+    rate_429: float = 0.0  # probability of an injected 429
+    rate_5xx: float = 0.0  # probability of an injected 500/529
+    max_rps: float = 0.0  # token-bucket throughput cap (0 = unlimited)
+    max_in_flight: int = 0  # concurrent request cap (0 = unlimited)
+    satisfactory: bool = True  # value synthesized for boolean fields (e.g. reflection's is_satisfactory)
+    results_per_query: int = 3  # Tavily results when max_results isn't sent
+    raw_content_chars: int = 6000
+    seed: int | None = None
+
+
+class _TokenBucket:
+    def __init__(self, rate: float):
+        self.rate, self.tokens, self.updated = rate, rate, time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+@dataclass
+class StandinStats:
+    requests: Counter = field(default_factory=Counter)  # by path
+    statuses: Counter = field(default_factory=Counter)
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    response_bytes: int = 0
+
+    def as_dict(self) -> dict:
+        return {"requests": dict(self.requests), "statuses": {str(k): v for k, v in self.statuses.items()},
+                "in_flight": self.in_flight, "peak_in_flight": self.peak_in_flight,
+                "input_tokens": self.input_tokens, "output_tokens": self.output_tokens,
+                "response_bytes": self.response_bytes}
+
+
+def _seeded(*parts: str) -> random.Random:
+    return random.Random(hashlib.sha256("\x00".join(parts).encode()).digest())
+
+
+def synthesize(schema: dict, name: str = "value", satisfactory: bool = True, defs: dict | None = None) -> object:
+    """A plausible instance of a JSON schema (pydantic and hand-written schemas)."""
+    defs = defs if defs is not None else schema.get("$defs", schema.get("definitions", {}))
+    if "$ref" in schema:
+        return synthesize(defs.get(schema["$ref"].rsplit("/", 1)[-1], {}), name, satisfactory, defs)
+    if "default" in schema and schema["default"] is not None:
+        return schema["default"]
+    if "enum" in schema:
+        return schema["enum"][0]
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = [s for s in schema[key] if s.get("type") != "null"] or schema[key]
+            return synthesize(options[0], name, satisfactory, defs)
+    kind = schema.get("type", "object" if "properties" in schema else "string")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "string")
+    if kind == "object":
+        return {prop: synthesize(sub, prop, satisfactory, defs) for prop, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        count = min(max(ARRAY_ITEMS, schema.get("minItems", 0)), schema.get("maxItems", ARRAY_ITEMS))
+        items = [synthesize(schema.get("items", {}), name, satisfactory, defs) for _ in range(count)]
+        return [f"{item} {i}" if isinstance(item, str) else item for i, item in enumerate(items, 1)]
+    if kind == "integer":
+        return 2000 if "year" in name else 1
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return satisfactory
+    return f"stand-in {name.replace('_', ' ')}"
+
+
+def _estimate_tokens(payload) -> int:
+    return max(1, len(json.dumps(payload)) // 4)
+
+
+def anthropic_response(body: dict, config: StandinConfig) -> dict:
+    tools = {t["name"]: t for t in body.get("tools", []) if "name" in t}
+    choice = body.get("tool_choice") or {}
+    tool = tools.get(choice.get("name")) if choice.get("type") == "tool" else None
+    if tool is None and choice.get("type") == "any" and tools:
+        tool = next(iter(tools.values()))
+    if tool is not None:
+        content = [{"type": "tool_use", "id": f"toolu_{hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest()[:24]}",
+                    "name": tool["name"], "input": synthesize(tool.get("input_schema", {}), tool["name"], config.satisfactory)}]
+        stop_reason = "tool_use"
+    else:
+        content = [{"type": "text", "text": "Stand-in notes:\n- " + "\n- ".join(
+            f"detail {i} from the provided sources" for i in range(1, 6))}]
+        stop_reason = "end_turn"
+    return {
+        "id": f"msg_standin_{time.monotonic_ns()}",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "stand-in"),
+        "content": content,
+        "stop_reason": stop_reason,
+        "stop_sequence": None,
+        "usage": {"input_tokens": _estimate_tokens(body.get("messages", [])) + _estimate_tokens(body.get("system", "")),
+                  "output_tokens": _estimate_tokens(content)},
+    }
+
+
+def _document(url: str, topic: str, config: StandinConfig) -> tuple[str, str, str]:
+    rng = _seeded(url)
+    words = ["founded", "product", "funding", "series", "customers", "platform", "revenue", "team", "launched", "investors"]
+    sentences = [f"{topic.title()} {' '.join(rng.choice(words) for _ in range(10))}." for _ in range(3)]
+    raw = " ".join(sentences)
+    raw = (raw + " ") * (config.raw_content_chars // max(1, len(raw) + 1) + 1)
+    return f"{topic.title()} | {url.rsplit('/', 1)[-1]}", " ".join(sentences[:2]), raw[:config.raw_content_chars]
+
+
+def tavily_search_response(body: dict, config: StandinConfig) -> dict:
+    query = str(body.get("query", ""))
+    rng = _seeded(query)
+    results = []
+    for i in range(int(body.get("max_results") or config.results_per_query)):
+        url = f"https://example.com/{hashlib.sha1(f'{query}/{i}'.encode()).hexdigest()[:12]}"
+        title, content, raw = _document(url, query, config)
+        result = {"url": url, "title": title, "content": content, "score": round(1 - i * 0.1 - rng.random() * 0.05, 4)}
+        result["raw_content"] = raw if body.get("include_raw_content") else None
+        results.append(result)
+    return {"query": query, "results": results, "images": [], "answer": None, "response_time": 0.0}
+
+
+def tavily_extract_response(body: dict, config: StandinConfig) -> dict:
+    urls = body.get("urls") or []
+    urls = [urls] if isinstance(urls, str) else urls
+    return {"results": [{"url": url, "raw_content": _document(url, url.rsplit("/", 1)[-1], config)[2]} for url in urls],
+            "failed_results": [], "response_time": 0.0}
+
+
+ROUTES = {
+    "/v1/messages": anthropic_response,
+    "/search": tavily_search_response,
+    "/extract": tavily_extract_response,
+}
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: StandinConfig):
+        super().__init__(address, _Handler)
+        self.config = config
+        self.stats = StandinStats()
+        self.rng = random.Random(config.seed)
+        self.bucket = _TokenBucket(config.max_rps) if config.max_rps else None
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StandinServer
+    protocol_version = "HTTP/1.1"  # keep-alive, so client connection pools behave as in production
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: dict, headers: dict | None = None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled the request (e.g. an abandoned speculative or adaptive search)
+            status = "client_closed"
+            self.close_connection = True
+        with self.server.lock:
+            self.server.stats.statuses[status] += 1
+            self.server.stats.response_bytes += len(data)
+
+    def _error(self, status: int, kind: str, message: str, retry_after: float | None = None):
+        headers = {"retry-after": f"{retry_after:g}"} if retry_after is not None else None
+        if self.path.startswith("/v1/"):
+            self._send(status, {"type": "error", "error": {"type": kind, "message": message}}, headers)
+        else:
+            self._send(status, {"detail": {"error": message}}, headers)
+
+    def do_GET(self):
+        if self.path == "/_stats":
+            with self.server.lock:
+                stats = self.server.stats.as_dict()
+            self._send(200, stats)
+        else:
+            self._error(404, "not_found_error", f"no route {self.path}")
+
+    def do_POST(self):
+        server, config = self.server, self.server.config
+        body_bytes = self.rfile.read(int(self.headers.get("content-length") or 0))
+        path = self.path.split("?", 1)[0]
+        handler = ROUTES.get(path)
+        with server.lock:
+            server.stats.requests[path] += 1
+            server.stats.in_flight += 1
+            server.stats.peak_in_flight = max(server.stats.peak_in_flight, server.stats.in_flight)
+            in_flight = server.stats.in_flight
+            roll = server.rng.random()
+            delay = max(0.0, config.latency_ms + server.rng.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+        try:
+            if handler is None:
+                return self._error(404, "not_found_error", f"no route {path}")
+            if config.max_in_flight and in_flight > config.max_in_flight:
+                return self._error(429, "rate_limit_error", "too many concurrent requests", retry_after=1)
+            if server.bucket and not server.bucket.take():
+                return self._error(429, "rate_limit_error", "requests per second exceeded", retry_after=1)
+            time.sleep(delay)
+            if roll < config.rate_429:
+                return self._error(429, "rate_limit_error", "injected rate limit", retry_after=1)
+            if roll < config.rate_429 + config.rate_5xx:
+                status = 529 if path.startswith("/v1/") and roll < config.rate_429 + config.rate_5xx / 2 else 500
+                return self._error(status, "overloaded_error" if status == 529 else "api_error", "injected server error")
+            try:
+                body = json.loads(body_bytes or b"{}")
+            except ValueError:
+                return self._error(400, "invalid_request_error", "body is not JSON")
+            if path == "/v1/messages" and body.get("stream"):
+                return self._error(400, "invalid_request_error", "streaming is not supported by the stand-in")
+            payload = handler(body, config)
+            if "usage" in payload:
+                with server.lock:
+                    server.stats.input_tokens += payload["usage"]["input_tokens"]
+                    server.stats.output_tokens += payload["usage"]["output_tokens"]
+            self._send(200, payload)
+        finally:
+            with server.lock:
+                server.stats.in_flight -= 1
+
+
+def start_standin(config: StandinConfig | None = None, host: str = "127.0.0.1", port: int = 0) -> StandinServer:
+    """Serve in a daemon thread; port 0 picks a free port (see `.url`)."""
+    server = StandinServer((host, port), config or StandinConfig())
+    threading.Thread(target=server.serve_forever, name=f"standin-{server.server_address[1]}", daemon=True).start()
+    return server
+
+
+@contextlib.contextmanager
+def running_standins(anthropic: StandinConfig | None = None, tavily: StandinConfig | None = None):
+    """Start both stand-ins and yield (anthropic_server, tavily_server)."""
+    servers = (start_standin(anthropic), start_standin(tavily))
+    try:
+        yield servers
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve local Anthropic / Tavily stand-ins for load testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--anthropic-port", type=int, default=8081)
+    parser.add_argument("--tavily-port", type=int, default=8082)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=0.0)
+    parser.add_argument("--max-in-flight", type=int, default=0)
+    parser.add_argument("--unsatisfactory", action="store_true", help="Synthesize False for booleans (forces reflection loops)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    config = StandinConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_429=args.rate_429, rate_5xx=args.rate_5xx,
+                           max_rps=args.max_rps, max_in_flight=args.max_in_flight, satisfactory=not args.unsatisfactory, seed=args.seed)
+    anthropic = start_standin(config, args.host, args.anthropic_port)
+    tavily = start_standin(config, args.host, args.tavily_port)
+    print(f"export ANTHROPIC_API_URL={anthropic.url} ANTHROPIC_API_KEY=standin")
+    print(f"export TAVILY_API_URL={tavily.url} TAVILY_API_KEY=standin")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps({"anthropic": anthropic.stats.as_dict(), "tavily": tavily.stats.as_dict()}))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,22 @@
-from langchain_core.messages import HumanMessage
-
 INITIAL_STATE = {
     "company_name": "Anthropic",
 }
 
+# Schema of the company object the harness expects (see USER_TASK); drives the field comparators
+EXTRACTION_SCHEMA = {
+    "title": "CompanyInfo",
+    "type": "object",
+    "properties": {
+        "company_name": {"type": "string"},
+        "founding_year": {"type": "integer"},
+        "founder_names": {"type": "array", "items": {"type": "string"}},
+        "product_description": {"type": "string"},
+        "funding_summary": {"type": "string"},
+        "notable_customers": {"type": "string"},
+    },
+    "required": ["company_name"],
+}
+
 MINIMAL_STATE = {
     "company_name": "Anthropic",
 }
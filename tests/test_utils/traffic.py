@@ -0,0 +1,283 @@
+"""
+Structured, low-overhead HTTP traffic recorder.
+
+Wraps the transport entry points of httpx (sync/async), requests and aiohttp and
+records one event per request: host, method, path, status, latency, request and
+response bytes, and (for LLM providers) token usage. Events update per-host
+counters and a latency histogram as they happen and optionally stream to JSONL,
+so queries like `llm_calls()` are answered from pre-aggregated counters.
+
+Hosts named by the provider base-URL overrides (e.g. ANTHROPIC_API_URL pointing
+at a local stand-in from standin_api) count as that provider's hosts.
+
+A per-run recorder can be bound to the current task with `current_recorder`;
+events then go to both the session recorder and the run's own recorder.
+"""
+
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from dataclasses import dataclass, field
+
+LLM_HOST_ALLOWLIST = [
+    "api.openai.com",
+    "api.anthropic.com",
+    "generativelanguage.googleapis.com",
+    "aiplatform.googleapis.com",
+    "openai.azure.com",
+    "api.cohere.ai", "cohere.ai",
+]
+
+TAVILY_HOST_ALLOWLIST = [
+    "api.tavily.com",
+]
+
+# Base-URL overrides the provider SDKs honour; their hosts are added to the allowlists at query time
+LLM_URL_ENV = ["ANTHROPIC_API_URL", "ANTHROPIC_BASE_URL", "OPENAI_BASE_URL"]
+TAVILY_URL_ENV = ["TAVILY_API_URL"]
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+
+def _hosts(allowlist: list[str], url_env: list[str]) -> list[str]:
+    overrides = [urllib.parse.urlsplit(os.environ[name]).netloc for name in url_env if os.getenv(name)]
+    return allowlist + [host for host in overrides if host]
+
+
+def llm_hosts() -> list[str]:
+    return _hosts(LLM_HOST_ALLOWLIST, LLM_URL_ENV)
+
+
+def tavily_hosts() -> list[str]:
+    return _hosts(TAVILY_HOST_ALLOWLIST, TAVILY_URL_ENV)
+
+
+current_recorder: contextvars.ContextVar["TrafficRecorder | None"] = contextvars.ContextVar("current_recorder", default=None)
+
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    errors: int = 0
+    statuses: Counter = field(default_factory=Counter)
+    request_bytes: int = 0
+    response_bytes: int = 0
+    latency_ms_total: float = 0.0
+    latency_hist: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    def percentile_ms(self, q: float) -> float | None:
+        """Upper bound of the histogram bucket holding the q-th percentile."""
+        if not self.requests:
+            return None
+        rank, seen = q * self.requests, 0
+        for idx, count in enumerate(self.latency_hist):
+            seen += count
+            if seen >= rank:
+                return float(LATENCY_BUCKETS_MS[idx]) if idx < len(LATENCY_BUCKETS_MS) else float("inf")
+        return float("inf")
+
+
+class TrafficRecorder:
+    def __init__(self, events_path: str | None = None):
+        self.hosts: dict[str, HostStats] = {}
+        self._lock = threading.Lock()
+        self._events = open(events_path, "a", buffering=1) if events_path else None
+
+    def record(self, event: dict) -> None:
+        with self._lock:
+            stats = self.hosts.get(event["host"])
+            if stats is None:
+                stats = self.hosts[event["host"]] = HostStats()
+            stats.requests += 1
+            if event.get("error") or (event.get("status") or 0) >= 400:
+                stats.errors += 1
+            stats.statuses[str(event.get("status"))] += 1
+            stats.request_bytes += event.get("request_bytes") or 0
+            stats.response_bytes += event.get("response_bytes") or 0
+            stats.latency_ms_total += event["latency_ms"]
+            stats.latency_hist[bisect.bisect_left(LATENCY_BUCKETS_MS, event["latency_ms"])] += 1
+            stats.input_tokens += event.get("input_tokens") or 0
+            stats.output_tokens += event.get("output_tokens") or 0
+            if self._events:
+                self._events.write(json.dumps(event) + "\n")
+
+    def calls(self, allowlist: list[str]) -> int:
+        return sum(s.requests for host, s in self.hosts.items() if any(h in host for h in allowlist))
+
+    def llm_calls(self) -> int:
+        return self.calls(llm_hosts())
+
+    def tavily_calls(self) -> int:
+        return self.calls(tavily_hosts())
+
+    def summary(self) -> dict:
+        """Per-host requests, errors, statuses, bytes, latency percentiles and token usage."""
+        with self._lock:
+            return {
+                host: {
+                    "requests": s.requests,
+                    "errors": s.errors,
+                    "statuses": dict(s.statuses),
+                    "request_bytes": s.request_bytes,
+                    "response_bytes": s.response_bytes,
+                    "latency_ms_mean": round(s.latency_ms_total / s.requests, 1) if s.requests else None,
+                    "latency_ms_p50": s.percentile_ms(0.5),
+                    "latency_ms_p95": s.percentile_ms(0.95),
+                    "input_tokens": s.input_tokens,
+                    "output_tokens": s.output_tokens,
+                }
+                for host, s in sorted(self.hosts.items())
+            }
+
+    def close(self) -> None:
+        if self._events:
+            self._events.close()
+            self._events = None
+
+
+def _usage(host: str, body: bytes | None) -> tuple[int, int]:
+    """Token usage from an LLM provider's JSON response body, when the body was read."""
+    if not body or not any(h in host for h in llm_hosts()):
+        return 0, 0
+    try:
+        usage = json.loads(body).get("usage") or {}
+    except (ValueError, AttributeError):
+        return 0, 0
+    return (usage.get("input_tokens") or usage.get("prompt_tokens") or 0,
+            usage.get("output_tokens") or usage.get("completion_tokens") or 0)
+
+
+def _emit(recorder: TrafficRecorder, method: str, url: str, started: float, status=None,
+          request_bytes=0, response_bytes=0, body: bytes | None = None, error: BaseException | None = None):
+    parsed = urllib.parse.urlsplit(str(url))
+    input_tokens, output_tokens = _usage(parsed.netloc, body)
+    event = {
+        "ts": time.time(),
+        "method": method,
+        "host": parsed.netloc,
+        "path": parsed.path,
+        "status": status,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        "request_bytes": request_bytes,
+        "response_bytes": response_bytes,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "error": f"{type(error).__name__}: {error}" if error else None,
+    }
+    recorder.record(event)
+    run_recorder = current_recorder.get()
+    if run_recorder is not None and run_recorder is not recorder:
+        run_recorder.record(event)
+
+
+def _httpx_sizes(request, response) -> tuple[int, int, bytes | None]:
+    try:
+        request_bytes = len(request.content)
+    except Exception:
+        request_bytes = int(request.headers.get("content-length", 0) or 0)
+    body = None
+    if response is not None:
+        try:
+            body = response.content
+        except Exception:
+            pass  # streamed response not read yet
+    if body is not None:
+        response_bytes = len(body)
+    elif response is not None:
+        response_bytes = int(response.headers.get("content-length", 0) or 0)
+    else:
+        response_bytes = 0
+    return request_bytes, response_bytes, body
+
+
+def install_recorder(monkeypatch, recorder: TrafficRecorder) -> None:
+    """Patch the HTTP client transports so every request is recorded (once) into `recorder`."""
+    try:
+        import httpx
+
+        _orig_send = httpx.Client.send
+        _orig_asend = httpx.AsyncClient.send
+
+        def _wrap_send(client, request, *a, **k):
+            started, response, error = time.perf_counter(), None, None
+            try:
+                response = _orig_send(client, request, *a, **k)
+                return response
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                req_b, resp_b, body = _httpx_sizes(request, response)
+                _emit(recorder, request.method, request.url, started, getattr(response, "status_code", None), req_b, resp_b, body, error)
+
+        async def _wrap_asend(client, request, *a, **k):
+            started, response, error = time.perf_counter(), None, None
+            try:
+                response = await _orig_asend(client, request, *a, **k)
+                return response
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                req_b, resp_b, body = _httpx_sizes(request, response)
+                _emit(recorder, request.method, request.url, started, getattr(response, "status_code", None), req_b, resp_b, body, error)
+
+        monkeypatch.setattr(httpx.Client, "send", _wrap_send, raising=False)
+        monkeypatch.setattr(httpx.AsyncClient, "send", _wrap_asend, raising=False)
+    except ImportError:
+        pass
+
+    try:
+        import requests
+
+        _orig_rsend = requests.sessions.Session.send
+
+        def _wrap_rsend(session, request, *a, **k):
+            started, response, error = time.perf_counter(), None, None
+            try:
+                response = _orig_rsend(session, request, *a, **k)
+                return response
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                body = request.body.encode() if isinstance(request.body, str) else request.body
+                content = None if response is None or k.get("stream") else response.content
+                resp_b = len(content) if content is not None else int(getattr(response, "headers", {}).get("content-length", 0) or 0)
+                _emit(recorder, request.method, request.url, started, getattr(response, "status_code", None),
+                      len(body or b""), resp_b, content, error)
+
+        monkeypatch.setattr(requests.sessions.Session, "send", _wrap_rsend, raising=False)
+    except ImportError:
+        pass
+
+    try:
+        import aiohttp
+
+        _orig_arequest = aiohttp.ClientSession._request
+
+        async def _wrap_arequest(session, method, str_or_url, *a, **k):
+            started, response, error = time.perf_counter(), None, None
+            try:
+                response = await _orig_arequest(session, method, str_or_url, *a, **k)
+                return response
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                data = k.get("data") or (json.dumps(k["json"]).encode() if k.get("json") is not None else b"")
+                resp_b = (response.content_length or 0) if response is not None else 0
+                _emit(recorder, method, str_or_url, started, getattr(response, "status", None),
+                      len(data) if isinstance(data, (bytes, str)) else 0, resp_b, None, error)
+
+        monkeypatch.setattr(aiohttp.ClientSession, "_request", _wrap_arequest, raising=False)
+    except ImportError:
+        pass
@@ -0,0 +1,172 @@
+"""
+Variance / flakiness mode for the scoring buckets.
+
+Runs the harness N times per candidate, all repetitions concurrently, each in its
+own isolated worker (`score_candidates.run_worker`). Deterministic sub-steps
+(code packing, graph rendering) are shared through the on-disk cache, while the
+judge verdict cache is bypassed so every repetition samples the live agent and
+judge. Reports mean, stddev and a t-based confidence interval for every bucket
+and every score key, flags unstable keys, and tests whether candidates' totals
+differ significantly (Welch's t-test).
+
+Usage (from tests/):
+    python -m test_utils.variance --dir ../../cand_a --repeat 5
+    python -m test_utils.variance --branch claude-1 --branch claude-2 --repeat 8 --tests test_01.py test_03.py
+"""
+
+import argparse
+import json
+import math
+import pathlib
+import statistics
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+
+from test_utils.score_candidates import DEFAULT_TESTS, HARNESS_ROOT, Candidate, WorkerResult, _parse_candidates, run_worker
+
+# Two-sided 95% critical values of Student's t by degrees of freedom; between entries df is rounded down (wider,
+# conservative interval), beyond the table the normal value is used
+T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+        11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093,
+        20: 2.086, 25: 2.060, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980}
+UNSTABLE_CV = 0.1  # stddev above this fraction of the key's max observed points is unstable
+
+
+def t_critical(df: float) -> float:
+    if df < 1:
+        return math.inf
+    if df > max(T_95):
+        return 1.960
+    return T_95[max(bound for bound in T_95 if bound <= df)]
+
+
+@dataclass
+class KeyStats:
+    key: str
+    n: int
+    mean: float
+    stddev: float
+    ci_low: float
+    ci_high: float
+    pass_rate: float | None
+    unstable: bool
+
+
+def summarize(key: str, values: list[float], passed: list[bool] | None = None, scale: float | None = None) -> KeyStats:
+    """Mean, sample stddev and 95% t-interval; unstable when pass/fail flips or spread is large relative to scale."""
+    n = len(values)
+    mean = statistics.fmean(values) if values else 0.0
+    stddev = statistics.stdev(values) if n > 1 else 0.0
+    half = t_critical(n - 1) * stddev / math.sqrt(n) if n > 1 else 0.0
+    pass_rate = sum(passed) / len(passed) if passed else None
+    scale = scale if scale else max((abs(v) for v in values), default=0.0)
+    unstable = (pass_rate is not None and 0 < pass_rate < 1) or (scale > 0 and stddev / scale > UNSTABLE_CV)
+    return KeyStats(key, n, round(mean, 4), round(stddev, 4), round(mean - half, 4), round(mean + half, 4),
+                    None if pass_rate is None else round(pass_rate, 4), unstable)
+
+
+def welch(a: list[float], b: list[float]) -> dict:
+    """Welch's t-test on two samples; significant at the 95% level when |t| exceeds the critical value."""
+    if len(a) < 2 or len(b) < 2:
+        return {"diff": None, "t": None, "df": None, "significant": False}
+    va, vb = statistics.variance(a) / len(a), statistics.variance(b) / len(b)
+    diff = statistics.fmean(a) - statistics.fmean(b)
+    if va + vb == 0:
+        return {"diff": round(diff, 4), "t": None, "df": None, "significant": diff != 0}
+    t = diff / math.sqrt(va + vb)
+    df = (va + vb) ** 2 / ((va ** 2) / (len(a) - 1) + (vb ** 2) / (len(b) - 1))
+    return {"diff": round(diff, 4), "t": round(t, 3), "df": round(df, 1), "significant": abs(t) > t_critical(df)}
+
+
+def run_repetitions(candidates: list[Candidate], repeat: int, work_root: pathlib.Path, tests: list[str],
+                    workers: int | None = None, timeout_s: float = 1800, memory_mb: int | None = 4096,
+                    cpu_s: int | None = None) -> dict[str, list[WorkerResult]]:
+    """Run every (candidate, repetition) pair concurrently; repetitions get private work dirs."""
+    run_id = uuid.uuid4().hex[:8]
+    jobs = [(c, i) for c in candidates for i in range(repeat)]
+    workers = workers or min(len(jobs), 16)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            (c.name, i): pool.submit(
+                run_worker, c, work_root / f"rep{i}", tests, timeout_s, memory_mb, cpu_s,
+                {"JUDGE_CACHE": "off", "HARNESS_RUN_ID": f"variance-{run_id}-r{i}"},
+            )
+            for c, i in jobs
+        }
+        return {c.name: [futures[(c.name, i)].result() for i in range(repeat)] for c in candidates}
+
+
+def variance_report(results: list[WorkerResult]) -> dict:
+    """Per-bucket and per-key statistics over the repetitions that produced a score."""
+    totals, buckets, keys = [], {}, {}
+    for r in results:
+        if r.scores:
+            totals.append(sum(s["points"] for s in r.scores.values()))
+        for bucket, s in r.scores.items():
+            buckets.setdefault(bucket, ([], s["max_points"]))[0].append(s["points"])
+            for key, d in s.get("details", {}).items():
+                values, passed = keys.setdefault(f"{bucket}.{key}", ([], []))
+                values.append(d["points"])
+                if d.get("passed") is not None:
+                    passed.append(bool(d["passed"]))
+    return {
+        "repetitions": len(results),
+        "failed_runs": sum(r.status != "ok" for r in results),
+        "totals": totals,
+        "total": asdict(summarize("total", totals)),
+        "buckets": {b: asdict(summarize(b, v, scale=m)) for b, (v, m) in sorted(buckets.items())},
+        "keys": {k: asdict(summarize(k, v, p)) for k, (v, p) in sorted(keys.items())},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure score variance by repeating the harness concurrently.")
+    parser.add_argument("--dir", action="append", default=[], help="Candidate directory (repeatable)")
+    parser.add_argument("--branch", action="append", default=[], help="Candidate branch in --repo (repeatable)")
+    parser.add_argument("--repo", default=str(HARNESS_ROOT.parent), help="Git repo holding candidate branches")
+    parser.add_argument("--tests", nargs="+", default=DEFAULT_TESTS, help="Harness test files to run")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per candidate")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=1800, help="Per-run wall-clock timeout (s)")
+    parser.add_argument("--memory-mb", type=int, default=4096, help="Per-worker data-segment cap (0 = none)")
+    parser.add_argument("--cpu-s", type=int, default=0, help="Per-worker CPU-time cap (0 = none)")
+    parser.add_argument("--work-dir", default=str(HARNESS_ROOT / ".runs" / "variance"))
+    parser.add_argument("--out", default=str(HARNESS_ROOT / "results" / "variance.json"))
+    args = parser.parse_args(argv)
+
+    candidates = _parse_candidates(args)
+    if not candidates:
+        parser.error("pass at least one --dir or --branch")
+    if args.repeat < 2:
+        parser.error("--repeat must be at least 2 to estimate variance")
+
+    runs = run_repetitions(candidates, args.repeat, pathlib.Path(args.work_dir),
+                           [str(pathlib.Path(t).resolve()) for t in args.tests],
+                           args.workers, args.timeout, args.memory_mb or None, args.cpu_s or None)
+    reports = {name: variance_report(results) for name, results in runs.items()}
+    ranked = sorted(reports, key=lambda name: -reports[name]["total"]["mean"])
+    comparisons = {f"{ranked[0]} vs {other}": welch(reports[ranked[0]]["totals"], reports[other]["totals"])
+                   for other in ranked[1:]}
+
+    out = pathlib.Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"candidates": reports, "comparisons": comparisons}, f, indent=2)
+
+    for name in ranked:
+        report = reports[name]
+        total = report["total"]
+        print(f"{name}: total {total['mean']:.2f} ± {total['stddev']:.2f} "
+              f"(95% CI {total['ci_low']:.2f}..{total['ci_high']:.2f}, n={total['n']}, failed runs={report['failed_runs']})")
+        for stats in report["keys"].values():
+            if stats["unstable"]:
+                print(f"    unstable: {stats['key']:<50} mean {stats['mean']:.2f} sd {stats['stddev']:.2f} pass rate {stats['pass_rate']}")
+    for label, result in comparisons.items():
+        verdict = "significant" if result["significant"] else "not significant"
+        print(f"{label}: diff {result['diff']} (t={result['t']}, df={result['df']}) {verdict}")
+    print(f"Variance report written to {out}")
+
+
+if __name__ == "__main__":
+    main()